@@ -0,0 +1,161 @@
+"""Перезапуски приложения без браузера: время и пиковая память каждого шага от поиска до вкладок.
+
+``AppTest`` проходит все три состояния (поиск → выбор школ → результаты) и все
+четыре вкладки на синтетических каталогах и отзывах нескольких размеров.
+Каждый размер идёт в свежем интерпретаторе с чистым каталогом данных, время и
+память снимаются в отдельных прогонах: ``tracemalloc`` сам замедляет код.
+
+    python benchmarks/app.py --sizes small medium large
+    python benchmarks/app.py --update      # записать текущие замеры как базовые
+
+Замеры сравниваются с ``benchmarks/baselines/app.json``: шаг дольше базового
+больше чем на ``--time-tolerance`` (плюс ``--time-slack`` секунд на шум) или
+прожорливее больше чем на ``--memory-tolerance`` — регрессия, код выхода 1.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+APP = ROOT / "streamlit_app.py"
+BASELINES = Path(__file__).resolve().parent / "baselines" / "app.json"
+
+# Размер выдачи растёт с каталогом, объём отзывов школы — с множителем частоты
+SIZES = {
+    "small": {"SPY_TOOL_CATALOG_SIZE": "1000", "SPY_TOOL_REVIEW_RATE": "0.25"},
+    "medium": {"SPY_TOOL_CATALOG_SIZE": "20000", "SPY_TOOL_REVIEW_RATE": "1"},
+    "large": {"SPY_TOOL_CATALOG_SIZE": "120000", "SPY_TOOL_REVIEW_RATE": "4"},
+}
+SELECTED_IDS = {"netology.ru", "texterra.ru", "webcanape.ru"}
+TABS = {
+    "вкладка: общая": "📊 Общая информация",
+    "вкладка: отзывы": "⭐ Отзывы и репутация",
+    "вкладка: соцсети": "📱 Соцсети",
+    "вкладка: креативы": "🎨 Генератор креативов",
+}
+
+
+def button(at, text):
+    return next(b for b in at.button if text in b.label)
+
+
+def walk():
+    """Шаги сценария: ``[(название, действие над AppTest)]``, каждое действие — один перезапуск."""
+    def select(at):
+        at.session_state.selected_ids = SELECTED_IDS
+        at.run()
+
+    def tab(label):
+        def open_tab(at):
+            # Переключение вкладки через состояние: клик по виджету в AppTest сбрасывает вкладки
+            at.session_state["analysis_tab"] = label
+            at.run()
+        return open_tab
+
+    return [
+        ("поиск: форма", lambda at: at.run()),
+        ("поиск: выдача", lambda at: button(at, "Найти конкурентов").click().run()),
+        ("выбор: фильтр", lambda at: at.text_input[0].input("маркетинг").run()),
+        ("выбор: сброс фильтра", lambda at: at.text_input[0].input("").run()),
+        ("выбор: отметить школы", select),
+        ("результаты: анализ", lambda at: button(at, "Анализировать").click().run()),
+        *[(name, tab(label)) for name, label in TABS.items()],
+    ]
+
+
+def run_walk(memory):
+    """Один проход сценария в этом процессе: ``{шаг: секунды или пик памяти в МБ}``."""
+    from streamlit.testing.v1 import AppTest
+
+    if memory:
+        tracemalloc.start()
+    at = AppTest.from_file(str(APP), default_timeout=600)
+    measured = {}
+    for name, step in walk():
+        if memory:
+            tracemalloc.reset_peak()
+        started = time.perf_counter()
+        step(at)
+        seconds = time.perf_counter() - started
+        if at.exception:
+            raise RuntimeError(f"{name}: {at.exception[0].value}")
+        measured[name] = tracemalloc.get_traced_memory()[1] / 2 ** 20 if memory else seconds
+    return measured
+
+
+def measure(size, memory):
+    """Проход в свежем интерпретаторе со своим каталогом данных и объёмом синтетики."""
+    env = {
+        **os.environ, **SIZES[size], "PYTHONPATH": str(ROOT),
+        "SPY_TOOL_DATA_DIR": tempfile.mkdtemp(prefix=f"spy_tool_app_{size}_"),
+    }
+    command = [sys.executable, __file__, "--walk"] + (["--memory"] if memory else [])
+    output = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True)
+    if output.returncode:
+        raise RuntimeError(f"{size}: {output.stderr.strip().splitlines()[-1]}")
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=list(SIZES))
+    parser.add_argument("--runs", type=int, default=1, help="проходов на размер, берётся медиана")
+    parser.add_argument("--time-tolerance", type=float, default=0.5, help="допустимый рост времени, доля")
+    parser.add_argument("--time-slack", type=float, default=0.05, help="запас на шум для быстрых шагов, с")
+    parser.add_argument("--memory-tolerance", type=float, default=0.25, help="допустимый рост памяти, доля")
+    parser.add_argument("--update", action="store_true", help="записать замеры как базовые")
+    parser.add_argument("--walk", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--memory", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.walk:
+        print(json.dumps(run_walk(args.memory), ensure_ascii=False))
+        return 0
+
+    baselines = json.loads(BASELINES.read_text()) if BASELINES.exists() else {}
+    failures = []
+    for size in args.sizes:
+        seconds = [measure(size, memory=False) for _ in range(args.runs)]
+        peaks = [measure(size, memory=True) for _ in range(args.runs)]
+        results = {
+            name: {
+                "seconds": round(statistics.median(run[name] for run in seconds), 3),
+                "peak_mb": round(statistics.median(run[name] for run in peaks), 1),
+            }
+            for name in seconds[0]
+        }
+
+        print(f"\n{size} ({', '.join(f'{k}={v}' for k, v in SIZES[size].items())}):")
+        print(f"  {'шаг':<24} {'время, с':>9} {'база':>7} {'пик, МБ':>9} {'база':>7}")
+        for name, result in results.items():
+            base = baselines.get(size, {}).get(name)
+            print(f"  {name:<24} {result['seconds']:>9.3f} {base['seconds'] if base else '—':>7} "
+                  f"{result['peak_mb']:>9.1f} {base['peak_mb'] if base else '—':>7}")
+            if base is None or args.update:
+                continue
+            if result["seconds"] > base["seconds"] * (1 + args.time_tolerance) + args.time_slack:
+                failures.append(f"{size} / {name}: {result['seconds']:.3f} с, база {base['seconds']} с")
+            if result["peak_mb"] > base["peak_mb"] * (1 + args.memory_tolerance):
+                failures.append(f"{size} / {name}: {result['peak_mb']:.1f} МБ, база {base['peak_mb']} МБ")
+        if args.update:
+            baselines[size] = results
+
+    if args.update:
+        BASELINES.parent.mkdir(exist_ok=True)
+        BASELINES.write_text(json.dumps(baselines, ensure_ascii=False, indent=2) + "\n")
+        print(f"\nБазовые замеры записаны в {BASELINES.relative_to(ROOT)}")
+    for failure in failures:
+        print(f"РЕГРЕССИЯ: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+"""Сведение дублей на большом каталоге: время ``spy_tool.resolve.cluster`` и сколько дублей найдено.
+
+К синтетическому каталогу добавляются копии случайных школ под другим названием
+и адресом (как их отдал бы другой источник), чтобы было что сливать:
+
+    python benchmarks/resolve.py --size 100000 --duplicates 5000 --budget 5
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from spy_tool.catalog import stub_catalog  # noqa: E402
+from spy_tool.resolve import cluster  # noqa: E402
+
+# Как другой источник мог бы записать ту же школу
+VARIANTS = [
+    lambda name, url: (f"{name} Онлайн", f"https://www.{url}/courses/"),
+    lambda name, url: (url, url),
+    lambda name, url: (name.upper(), url.replace(".online", ".ru")),
+    # Другой домен: такую копию находит только LSH по названию
+    lambda name, url: (name, url.replace(".online", "-group.ru")),
+]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=100_000, help="школ в каталоге")
+    parser.add_argument("--duplicates", type=int, default=5000, help="сколько копий добавить")
+    parser.add_argument("--budget", type=float, help="бюджет на сведение, с")
+    args = parser.parse_args(argv)
+
+    frame = stub_catalog(args.size).frame
+    names, urls = frame["name"].tolist(), frame["url"].tolist()
+    rng = np.random.default_rng(1)
+    originals = rng.choice(len(names), args.duplicates, replace=False)
+    for number, row in enumerate(originals):
+        name, url = VARIANTS[number % len(VARIANTS)](names[row], urls[row])
+        names.append(name)
+        urls.append(url)
+
+    started = time.perf_counter()
+    labels, ids = cluster(names, urls)
+    seconds = time.perf_counter() - started
+
+    found = np.mean(labels[len(frame):] == labels[originals])
+    print(f"Записей: {len(names)}, школ после сведения: {len(np.unique(labels))}")
+    print(f"Копий слито с оригиналом: {found:.1%}")
+    print(f"Время: {seconds:.2f} с")
+    if args.budget is not None and seconds > args.budget:
+        print(f"РЕГРЕССИЯ: {seconds:.2f} с > бюджета {args.budget} с")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+"""Аналитика соцсетей на большой истории: время ``social_summary`` по школе с N постами.
+
+    python benchmarks/social.py --posts 50000 --runs 5 --budget 0.5
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from spy_tool.social import DAY, NETWORKS, PostStore, social_summary, stub_posts, stub_profile  # noqa: E402
+
+HISTORY_DAYS = 730
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, default=50_000, help="постов в каждой соцсети")
+    parser.add_argument("--runs", type=int, default=5, help="число замеров, берётся медиана")
+    parser.add_argument("--budget", type=float, help="бюджет на сводку по школе, с")
+    args = parser.parse_args(argv)
+
+    store = PostStore(Path(tempfile.mkdtemp(prefix="spy_tool_social_")))
+    now = int(time.time())
+    for network in NETWORKS:
+        store.append("bench", network, stub_posts("bench", network, now - HISTORY_DAYS * DAY, now,
+                                                  per_day=args.posts / HISTORY_DAYS))
+    total = sum(len(store.load("bench", network)["time"]) for network in NETWORKS)
+
+    seconds = []
+    for _ in range(args.runs):
+        started = time.perf_counter()
+        social_summary(store, "bench", stub_profile("bench"), now)
+        seconds.append(time.perf_counter() - started)
+    median = statistics.median(seconds)
+
+    print(f"Постов у школы: {total:,}")
+    print(f"Сводка (медиана из {args.runs}): {median * 1000:.1f} мс")
+    if args.budget is not None and median > args.budget:
+        print(f"РЕГРЕССИЯ: {median:.3f} с > бюджета {args.budget} с")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""Холодный старт приложения: время импорта и время до первой отрисовки страниц.
+
+Каждый замер идёт в свежем интерпретаторе, как на только что поднятом поде:
+
+    python benchmarks/startup.py --runs 5 --search-budget 1.5 --results-budget 3
+
+С бюджетами скрипт завершается с кодом 1, если медиана их превышает или если
+страница поиска потянула за собой pandas/plotly — так регрессии видны в CI.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+APP = ROOT / "streamlit_app.py"
+HEAVY_MODULES = ["pandas", "numpy", "plotly.express", "pyarrow"]
+
+# Импорт по отдельности: каждый модуль в своём процессе, иначе общие зависимости считаются один раз
+IMPORT_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+print(json.dumps({{"seconds": time.perf_counter() - started}}))
+"""
+
+SEARCH_PROBE = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({app!r}, default_timeout=60)
+started = time.perf_counter()
+at.run()
+seconds = time.perf_counter() - started
+assert not at.exception, at.exception
+print(json.dumps({{"seconds": seconds, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+# До страницы результатов доходим по-настоящему: поиск, выбор школ, анализ.
+# Засекаем только шаг «Анализировать» -> отрисованные результаты (анализ берётся из прогретого кеша)
+RESULTS_PROBE = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({app!r}, default_timeout=60)
+at.run()
+at.button[0].click().run()
+at.session_state.selected_ids = {{"netology.ru", "texterra.ru", "webcanape.ru"}}
+at.run()
+button = next(b for b in at.button if "Анализировать" in b.label)
+started = time.perf_counter()
+button.click().run()
+seconds = time.perf_counter() - started
+assert not at.exception, at.exception
+assert any("Анализ конкурентов завершен" in m.value for m in at.markdown), "нет страницы результатов"
+print(json.dumps({{"seconds": seconds}}))
+"""
+
+
+def probe(code, env):
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3, help="число замеров, берётся медиана")
+    parser.add_argument("--search-budget", type=float, help="бюджет первой отрисовки поиска, с")
+    parser.add_argument("--results-budget", type=float, help="бюджет первой отрисовки результатов, с")
+    args = parser.parse_args(argv)
+
+    data_dir = tempfile.mkdtemp(prefix="spy_tool_startup_")
+    env = {**os.environ, "SPY_TOOL_DATA_DIR": data_dir, "PYTHONPATH": str(ROOT)}
+
+    def median(code):
+        return statistics.median(probe(code, env)["seconds"] for _ in range(args.runs))
+
+    print(f"Замеров на метрику: {args.runs}, данные: {data_dir}")
+    print("\nИмпорт (с):")
+    for module in ["streamlit", "spy_tool.discovery", "pandas", "plotly.express", "spy_tool.analysis", "spy_tool.charts"]:
+        print(f"  {module:<20} {median(IMPORT_PROBE.format(module=module)):.3f}")
+
+    searches = [probe(SEARCH_PROBE.format(app=str(APP), heavy=HEAVY_MODULES), env) for _ in range(args.runs)]
+    search_seconds = statistics.median(search["seconds"] for search in searches)
+    heavy = sorted({module for search in searches for module in search["heavy"]})
+    # Первый прогон только прогревает кеш анализа, в медиану он не входит
+    probe(RESULTS_PROBE.format(app=str(APP)), env)
+    results_seconds = median(RESULTS_PROBE.format(app=str(APP)))
+
+    print("\nПервая отрисовка (с):")
+    print(f"  {'страница поиска':<20} {search_seconds:.3f}")
+    print(f"  {'страница результатов':<20} {results_seconds:.3f}")
+    print(f"\nТяжёлые модули на странице поиска: {', '.join(heavy) or 'нет'}")
+
+    failures = []
+    if heavy:
+        failures.append("страница поиска импортирует " + ", ".join(heavy))
+    if args.search_budget is not None and search_seconds > args.search_budget:
+        failures.append(f"поиск {search_seconds:.3f} с > бюджета {args.search_budget} с")
+    if args.results_budget is not None and results_seconds > args.results_budget:
+        failures.append(f"результаты {results_seconds:.3f} с > бюджета {args.results_budget} с")
+    for failure in failures:
+        print(f"РЕГРЕССИЯ: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
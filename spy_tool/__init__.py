@@ -0,0 +1 @@
+"""Ядро Spy-Tool: сбор и анализ данных о конкурентах без привязки к UI."""
@@ -0,0 +1,177 @@
+"""Анализ выбранных школ: сборщики данных по всем школам параллельно."""
+
+import copy
+import hashlib
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+from .metrics import METRICS
+from .mock_data import MOCK_PRICING, MOCK_TRAFFIC
+from .reviews import ReviewCollector
+from .social import SocialCollector
+from .timeseries import ActivityCollector
+
+DEFAULT_TIMEOUT = 10.0
+
+
+@dataclass
+class SchoolAnalysis:
+    """Результаты сборщиков по одной школе; упавшие и медленные — в ``errors``.
+
+    ``stored_at`` — когда собран результат каждого источника (unix-время).
+    """
+    school_id: str
+    results: dict = field(default_factory=dict)
+    errors: dict = field(default_factory=dict)
+    stored_at: dict = field(default_factory=dict)
+
+
+def analysis_version(results):
+    """Короткий отпечаток данных анализа, на которых строятся креативы: версия в ключе их кеша.
+
+    Название и цена школы уже входят в промпт, поэтому здесь только темы похвал
+    и жалоб из отзывов (доли в целых процентах) и оффер из цен. Активность,
+    частота постов и число отзывов меняются с каждым обновлением, но креативы
+    от них не зависят и в отпечаток не входят.
+    """
+    topics = (results.get("reviews") or {}).get("topics") or {}
+    pricing = results.get("pricing") or {}
+    inputs = {
+        "praise": topics.get("praise", []),
+        "complaints": topics.get("complaints", []),
+        "offer": pricing.get("offer"),
+        "usp": pricing.get("usp"),
+    }
+    payload = json.dumps(inputs, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()[:12]
+
+
+class StubCollector:
+    """Сборщик-заглушка: возвращает копию мок-данных после имитации задержки.
+
+    Сборщик — любой вызываемый объект ``collector(school) -> dict``.
+    """
+
+    def __init__(self, payload, delay=0.0):
+        self.payload = payload
+        self.delay = delay
+
+    def __call__(self, school):
+        if self.delay:
+            time.sleep(self.delay)
+        return copy.deepcopy(self.payload)
+
+
+def default_collectors(topic_store=None, series_store=None, post_store=None):
+    return {
+        "traffic": StubCollector(MOCK_TRAFFIC, delay=0.2),
+        "activity": ActivityCollector(series_store),
+        "reviews": ReviewCollector(topic_store=topic_store),
+        "social": SocialCollector(post_store),
+        "pricing": StubCollector(MOCK_PRICING, delay=0.1),
+    }
+
+
+def analyze_schools(schools, collectors, timeouts=None, max_workers=20, on_progress=None, cache=None,
+                    serve_stale=False, shared=None):
+    """Запускает все пары (школа, сборщик) в общем ограниченном пуле потоков.
+
+    Результат — ``{id школы: SchoolAnalysis}``; ``id`` назначает ``spy_tool.resolve``.
+
+    ``timeouts`` задаёт лимит в секундах для каждого сборщика и отсчитывается
+    с момента фактического старта задачи, а не постановки в очередь. Сборщик,
+    не уложившийся в лимит, попадает в ``errors`` как ``"timeout"``, остальные
+    результаты школы при этом сохраняются.
+
+    ``on_progress(school_id, finished, total)`` вызывается после каждого завершённого
+    сборщика и позволяет показывать прогресс по каждой школе.
+
+    С ``cache`` (см. ``spy_tool.cache.AnalysisCache``) свежие результаты берутся
+    из кеша, запускаются только недостающие сборщики, а их ответы сохраняются.
+    С ``serve_stale`` берутся и устаревшие записи: живой сбор идёт, только если
+    снимка источника в кеше нет совсем (их держит тёплыми ``spy_tool.refresh``).
+
+    С ``shared`` (см. ``spy_tool.shared.SharedResults``) одновременные анализы одной
+    школы из разных сессий собирают каждый источник один раз: опоздавшие ждут
+    уже идущий сбор, а не запускают свой.
+    """
+    timeouts = timeouts or {}
+    analyses = {school["id"]: SchoolAnalysis(school["id"]) for school in schools}
+    finished = dict.fromkeys(analyses, 0)
+    started = {}
+
+    def collect(job, collector, school):
+        if cache and shared:
+            # Пока задача ждала в очереди, соседняя сессия могла уже собрать этот источник
+            cached = cache.get(job[0], stale=serve_stale).get(job[1])
+            if cached:
+                return cached
+        METRICS.count("collector_calls", source=job[1])
+        with METRICS.span("collector", source=job[1]):
+            outcome = collector(school)
+        if cache:
+            cache.put(job[0], job[1], outcome)
+        return time.time(), outcome
+
+    def run(job, collector, school):
+        started[job] = time.monotonic()
+        if shared is None:
+            return collect(job, collector, school)
+        return shared.get_or_compute(("analysis",) + job, lambda: collect(job, collector, school), keep=False)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        def settle(job, outcome, error=None, stored_at=None):
+            school_id, source = job
+            if error is None:
+                analyses[school_id].results[source] = outcome
+                analyses[school_id].stored_at[source] = stored_at or time.time()
+            else:
+                analyses[school_id].errors[source] = error
+            finished[school_id] += 1
+            if on_progress:
+                on_progress(school_id, finished[school_id], len(collectors))
+
+        pending = {}
+        for school in schools:
+            cached = cache.get(school["id"], stale=serve_stale) if cache else {}
+            for source, collector in collectors.items():
+                job = (school["id"], source)
+                if cache:
+                    METRICS.count("analysis_cache", result="hit" if source in cached else "miss")
+                if source in cached:
+                    stored_at, payload = cached[source]
+                    settle(job, payload, stored_at=stored_at)
+                else:
+                    pending[executor.submit(run, job, collector, school)] = job
+
+        while pending:
+            now = time.monotonic()
+            deadlines = {
+                future: started[job] + timeouts.get(job[1], DEFAULT_TIMEOUT)
+                for future, job in pending.items() if job in started
+            }
+            for future, deadline in deadlines.items():
+                if deadline <= now and not future.done():
+                    settle(pending.pop(future), None, "timeout")
+
+            wait_for = min(deadlines.values(), default=now + 0.05) - now
+            if len(deadlines) < len(pending):
+                # Часть задач ещё в очереди: просыпаемся чаще, чтобы засечь их старт
+                wait_for = min(wait_for, 0.05)
+            done, _ = wait(pending, timeout=max(wait_for, 0.01), return_when=FIRST_COMPLETED)
+            for future in done:
+                job = pending.pop(future)
+                try:
+                    stored_at, outcome = future.result()
+                except Exception as exc:
+                    settle(job, None, str(exc) or type(exc).__name__)
+                    continue
+                settle(job, outcome, stored_at=stored_at)
+    finally:
+        # Зависшие сборщики дорабатывают в фоне: этому анализу они уже не нужны, но попадут в кеш
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return analyses
@@ -0,0 +1,133 @@
+"""Двухуровневый кеш результатов анализа: LRU в памяти + SQLite на диске."""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from .settings import DATA_DIR
+from .store import connect
+
+HOUR = 3600
+
+# Как долго данные каждого сборщика считаются свежими
+DEFAULT_TTLS = {
+    "traffic": 24 * HOUR,
+    "activity": HOUR,
+    "reviews": 6 * HOUR,
+    "social": 3 * HOUR,
+    "pricing": 24 * HOUR,
+}
+DEFAULT_TTL = 6 * HOUR
+
+
+class AnalysisCache:
+    """Кеш результатов сборщиков по ключу (id школы, источник).
+
+    Горячие школы держатся в памяти (не больше ``max_memory_entries`` школ),
+    всё остальное — в SQLite (не больше ``max_disk_entries`` записей), поэтому
+    кеш переживает перезапуск приложения. Устаревшие по TTL записи не отдаются.
+    """
+
+    def __init__(self, path=None, ttls=None, max_memory_entries=256, max_disk_entries=50000):
+        self.path = path or DATA_DIR / "analysis.sqlite"
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._db = connect(self.path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS analysis ("
+            " url TEXT NOT NULL, source TEXT NOT NULL, stored_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL, payload TEXT NOT NULL,"
+            " PRIMARY KEY (url, source))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS analysis_accessed ON analysis (accessed_at)")
+        self._db.commit()
+
+    def ttl(self, source):
+        return self.ttls.get(source, DEFAULT_TTL)
+
+    def get(self, url, now=None, stale=False):
+        """Возвращает свежие результаты школы: ``{source: (stored_at, payload)}``.
+
+        С ``stale=True`` отдаёт и устаревшие по TTL записи — последний снимок каждого источника.
+        """
+        now = now or time.time()
+        with self._lock:
+            entries = self._memory.get(url)
+            if entries is None or any(now - stored_at >= self.ttl(source) for source, (stored_at, _) in entries.items()):
+                # В памяти нет или устарело: фоновое обновление могло уже записать новое на диск
+                loaded = self._load(url, now)
+                if loaded:
+                    self._remember(url, loaded)
+                entries = loaded or entries or {}
+            else:
+                self._memory.move_to_end(url)
+
+        return {
+            source: entry for source, entry in entries.items()
+            if stale or now - entry[0] < self.ttl(source)
+        }
+
+    def put(self, url, source, payload, now=None):
+        now = now or time.time()
+        with self._lock:
+            entries = dict(self._memory.get(url) or self._load(url, now))
+            entries[source] = (now, payload)
+            self._remember(url, entries)
+            self._db.execute(
+                "INSERT OR REPLACE INTO analysis VALUES (?, ?, ?, ?, ?)",
+                (url, source, now, now, json.dumps(payload, ensure_ascii=False)),
+            )
+            self._evict_disk()
+            self._db.commit()
+
+    def invalidate(self, url=None):
+        """Сбрасывает кеш одной школы или, без аргумента, целиком."""
+        with self._lock:
+            if url is None:
+                self._memory.clear()
+                self._db.execute("DELETE FROM analysis")
+            else:
+                self._memory.pop(url, None)
+                self._db.execute("DELETE FROM analysis WHERE url = ?", (url,))
+            self._db.commit()
+
+    def _load(self, url, now):
+        rows = self._db.execute(
+            "SELECT source, stored_at, payload FROM analysis WHERE url = ?", (url,)
+        ).fetchall()
+        if rows:
+            self._db.execute("UPDATE analysis SET accessed_at = ? WHERE url = ?", (now, url))
+            self._db.commit()
+        return {source: (stored_at, json.loads(payload)) for source, stored_at, payload in rows}
+
+    def _remember(self, url, entries):
+        self._memory[url] = entries
+        self._memory.move_to_end(url)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self):
+        (count,) = self._db.execute("SELECT COUNT(*) FROM analysis").fetchone()
+        excess = count - self.max_disk_entries
+        if excess > 0:
+            self._db.execute(
+                "DELETE FROM analysis WHERE rowid IN"
+                " (SELECT rowid FROM analysis ORDER BY accessed_at LIMIT ?)",
+                (excess,),
+            )
+
+
+def format_age(seconds):
+    """Возраст снимка по-человечески: «только что», «5 мин назад», «3 ч назад»."""
+    if seconds < 60:
+        return "только что"
+    if seconds < HOUR:
+        return f"{int(seconds // 60)} мин назад"
+    if seconds < 24 * HOUR:
+        return f"{int(seconds // HOUR)} ч назад"
+    return f"{int(seconds // (24 * HOUR))} дн назад"
@@ -0,0 +1,249 @@
+"""Локальный каталог школ: инвертированный индекс по основам слов и индексы для фильтров."""
+
+import functools
+import threading
+
+import numpy as np
+import pandas as pd
+
+from .discovery import NICHES, REGION_SCOPES, REGIONS, SIZE_RANGES
+from .mock_data import MOCK_DUPLICATES, MOCK_SCHOOLS
+from .resolve import cluster
+from .settings import CATALOG_SIZE
+from .text import stems
+
+# Поднаправления каждой ниши: из них собираются названия и ключевые слова школ
+CATEGORY_TOPICS = {
+    "Digital-маркетинг & SMM": ["SMM", "Таргетинг", "Контент-маркетинг", "Контекстная реклама", "SEO", "Email-маркетинг"],
+    "Программирование & IT": ["Python", "Веб-разработка", "Java", "Тестирование", "Data Science", "DevOps"],
+    "Дизайн & Графика": ["Графический дизайн", "UX/UI дизайн", "Моушн-дизайн", "Дизайн интерьера", "3D-моделирование"],
+    "Бизнес & Предпринимательство": ["Продуктовый менеджмент", "Управление проектами", "Продажи", "Стартапы", "HR"],
+    "Психология & Личностный рост": ["Психология отношений", "Коучинг", "Тайм-менеджмент", "Осознанность"],
+    "Языки & Лингвистика": ["Английский язык", "Китайский язык", "Немецкий язык", "Подготовка к IELTS"],
+    "Фитнес & Здоровье": ["Фитнес-тренер", "Йога", "Нутрициология", "Реабилитация"],
+    "Финансы & Инвестиции": ["Инвестиции", "Бухгалтерия", "Финансовая грамотность", "Трейдинг"],
+    "Кулинария & Хобби": ["Кондитерское дело", "Фотография", "Рисование", "Музыка"],
+    "Красота & Стиль": ["Макияж", "Маникюр", "Стилистика", "Парикмахерское искусство"],
+}
+FORMATS = ["Школа", "Академия", "Онлайн-школа", "Студия", "Институт", "Мастерская", "Лаборатория", "Клуб"]
+BRANDS = ["Вектор", "Фокус", "Альфа", "Ритм", "Старт", "Навык", "Точка", "Сфера", "Импульс", "Орбита", "Маяк", "Горизонт"]
+BRANDS_LATIN = ["vector", "focus", "alfa", "ritm", "start", "navyk", "tochka", "sfera", "impuls", "orbita", "mayak", "horizon"]
+TEXT_COLUMNS = ["name", "aliases", "niche", "keywords", "category"]
+RECORD_COLUMNS = ["id", "name", "aliases", "niche", "price", "students", "rating", "url", "category", "region"]
+# Другие названия школы в одной строковой колонке
+ALIAS_SEPARATOR = " / "
+FEATURES = ["с нуля", "трудоустройство", "стажировка", "сертификат", "наставник", "для начинающих", "профессия", "интенсив"]
+# Сборка общего каталога одна на процесс, даже если первые поиски пришли одновременно
+_DEFAULT_LOCK = threading.Lock()
+
+
+class SchoolCatalog:
+    """Каталог школ в колонках и индексы поверх них.
+
+    * текст (название, направление, ключевые слова, ниша) — инвертированный индекс
+      «основа слова -> номера строк», все списки лежат в одном массиве int32;
+    * цена и число студентов — отсортированные индексы: диапазон — два ``searchsorted``;
+    * ниша и регион — битовые карты по каждому значению.
+
+    Дубли уже слиты (см. ``merge_duplicates``): одна строка — одна школа с ``id``.
+    Строки держатся в колонках с компактными типами (int32, float32, категории,
+    строки pyarrow), а словари собираются только для попавших в выдачу школ.
+    """
+
+    def __init__(self, frame):
+        self.frame = frame.reset_index(drop=True)
+        self.size = len(self.frame)
+        self.price = self.frame["price"].to_numpy(np.int32)
+        self.students = self.frame["students"].to_numpy(np.int32)
+        self.rating = self.frame["rating"].to_numpy(np.float32)
+
+        self.price_order = np.argsort(self.price, kind="stable").astype(np.int32)
+        self.students_order = np.argsort(self.students, kind="stable").astype(np.int32)
+        self.price_sorted = self.price[self.price_order]
+        self.students_sorted = self.students[self.students_order]
+        self.category_bitmaps = {
+            category: (self.frame["category"] == category).to_numpy() for category in self.frame["category"].cat.categories
+        }
+        self.region_bitmaps = {
+            region: (self.frame["region"] == region).to_numpy() for region in self.frame["region"].cat.categories
+        }
+        # Популярность (от 0 до 1) решает порядок среди одинаково подходящих по тексту школ
+        self.popularity = ((self.rating / 5 + np.minimum(np.log10(np.maximum(self.students, 1)) / 6, 1)) / 2).astype(np.float32)
+        self._build_text_index()
+
+    def _build_text_index(self):
+        # Слова разбираем по уникальным значениям каждой колонки: направления, ниши и
+        # ключевые слова повторяются тысячи раз, а стеммер дорогой
+        self.stem_ids = {}
+        keys = []
+        for column in TEXT_COLUMNS:
+            codes, values = pd.factorize(self.frame[column].astype("string"))
+            value_stems = [[self.stem_ids.setdefault(word, len(self.stem_ids)) for word in set(stems(value))]
+                           for value in values]
+            lengths = np.array([len(ids) for ids in value_stems], dtype=np.int64)
+            flat = np.array([i for ids in value_stems for i in ids], dtype=np.int64)
+            starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+
+            # Разворачиваем «строка -> значение -> основы» в пары (основа, строка) без цикла по строкам
+            per_row = lengths[codes]
+            rows = np.repeat(np.arange(self.size, dtype=np.int64), per_row)
+            within = np.arange(per_row.sum()) - np.repeat(np.cumsum(per_row) - per_row, per_row)
+            keys.append(flat[starts[codes][rows] + within] * self.size + rows)
+
+        keys = np.sort(np.concatenate(keys))
+        keys = keys[np.concatenate([[True], keys[1:] != keys[:-1]])]
+        self.postings = (keys % self.size).astype(np.int32)
+        self.offsets = np.searchsorted(keys // self.size, np.arange(len(self.stem_ids) + 1)).astype(np.int64)
+        document_frequency = np.diff(self.offsets)
+        self.idf = np.log(1 + self.size / np.maximum(document_frequency, 1)).astype(np.float32)
+
+    def _sorted_range(self, order, sorted_values, low, high):
+        # Номера строк со значением в [low, high) по отсортированному индексу
+        lo = 0 if low is None else np.searchsorted(sorted_values, low, side="left")
+        hi = len(order) if high is None else np.searchsorted(sorted_values, high, side="left")
+        mask = np.zeros(self.size, dtype=bool)
+        mask[order[lo:hi]] = True
+        return mask
+
+    def filter_mask(self, query):
+        """Битовая маска строк, подходящих под нишу, регион, размер и цену."""
+        mask = self.category_bitmaps.get(query.niche, np.zeros(self.size, dtype=bool)).copy()
+        regions = REGION_SCOPES.get(query.region)
+        if regions is not None:
+            mask &= np.logical_or.reduce([self.region_bitmaps[region] for region in regions if region in self.region_bitmaps]
+                                         or [np.zeros(self.size, dtype=bool)])
+        low, high = SIZE_RANGES.get(query.school_size, (None, None))
+        if low is not None or high is not None:
+            mask &= self._sorted_range(self.students_order, self.students_sorted, low, high)
+        price_low, price_high = query.price_range
+        mask &= self._sorted_range(self.price_order, self.price_sorted, price_low, price_high + 1)
+        return mask
+
+    def text_scores(self, keywords):
+        """Сумма idf совпавших основ по строкам или ``None``, если ключевых слов нет."""
+        wanted = {self.stem_ids.get(word, -1) for word in stems(keywords)}
+        if not wanted:
+            return None
+        scores = np.zeros(self.size, dtype=np.float32)
+        for stem_id in wanted - {-1}:
+            rows = self.postings[self.offsets[stem_id]:self.offsets[stem_id + 1]]
+            scores[rows] += self.idf[stem_id]
+        return scores
+
+    def search(self, query, limit=1000):
+        """Номера строк выдачи по ``SearchQuery``, лучшие первыми.
+
+        С ключевыми словами в выдачу попадают только школы, где совпало хотя бы
+        одно слово; чем больше редких слов совпало, тем выше школа.
+        """
+        mask = self.filter_mask(query)
+        scores = self.text_scores(query.keywords)
+        if scores is None:
+            rank = self.popularity
+        else:
+            mask &= scores > 0
+            # Популярность не больше 1, а удвоенный idf любого слова больше: текст важнее
+            rank = scores * 2 + self.popularity
+        rows = np.flatnonzero(mask)
+        if len(rows) > limit:
+            rows = rows[np.argpartition(-rank[rows], limit - 1)[:limit]]
+        return rows[np.argsort(-rank[rows], kind="stable")]
+
+    def records(self, rows):
+        values = [self.frame[column].take(rows).tolist() for column in RECORD_COLUMNS]
+        return [dict(zip(RECORD_COLUMNS, row)) for row in zip(*values)]
+
+
+def merge_duplicates(frame):
+    """Одна строка на школу: дубли (см. ``spy_tool.resolve.cluster``) сливаются в строку
+    с наибольшим числом студентов, прочие названия уходят в колонку ``aliases``."""
+    _, ids = cluster(frame["name"].tolist(), frame["url"].tolist())
+    frame = frame.assign(id=ids)
+    merged = frame.sort_values("students", ascending=False, kind="stable").drop_duplicates("id").sort_index()
+
+    # Псевдонимы собираем только по кластерам из нескольких строк: их единицы
+    duplicated = frame[frame["id"].duplicated(keep=False)]
+    names = duplicated.groupby("id")["name"].agg(lambda values: list(dict.fromkeys(values)))
+    kept = merged.loc[merged["id"].isin(names.index)].set_index("id")["name"]
+    aliases = {
+        school_id: ALIAS_SEPARATOR.join(name for name in values if name != kept[school_id])
+        for school_id, values in names.items()
+    }
+    return merged.assign(aliases=merged["id"].map(aliases).fillna("")).reset_index(drop=True)
+
+
+def stub_catalog(size=CATALOG_SIZE, seed=7):
+    """Детерминированный синтетический каталог: мок-школы плюс ``size`` сгенерированных."""
+    rng = np.random.default_rng(seed)
+    categories = rng.integers(0, len(NICHES), size)
+    topic_index = rng.integers(0, 1000, size)
+    topics = np.array(
+        [CATEGORY_TOPICS[NICHES[c]][t % len(CATEGORY_TOPICS[NICHES[c]])] for c, t in zip(categories, topic_index)],
+        dtype=object,
+    )
+    brand = rng.integers(0, len(BRANDS), size)
+    formats = np.array(FORMATS, dtype=object)[rng.integers(0, len(FORMATS), size)]
+    features = np.array(FEATURES, dtype=object)
+    keywords = features[rng.integers(0, len(features), size)] + " " + features[rng.integers(0, len(features), size)]
+    ids = np.arange(size)
+
+    generated = pd.DataFrame({
+        "name": formats + " " + np.array(BRANDS, dtype=object)[brand] + " " + topics,
+        "niche": topics,
+        "keywords": keywords,
+        # Цена и аудитория распределены логнормально, как у реальных школ
+        "price": np.clip(np.round(rng.lognormal(10.6, 0.6, size), -2), 3000, 300000).astype(np.int32),
+        "students": np.clip(rng.lognormal(7.5, 1.6, size), 50, 500000).astype(np.int32),
+        "rating": np.round(rng.uniform(3.2, 5.0, size), 1),
+        "url": [f"{BRANDS_LATIN[b]}-{i:06d}.online" for b, i in zip(brand, ids)],
+        "category": np.array(NICHES, dtype=object)[categories],
+        "region": np.array(REGIONS, dtype=object)[rng.choice(len(REGIONS), size, p=[0.7, 0.2, 0.1])],
+    })
+    mock = pd.DataFrame(MOCK_SCHOOLS + MOCK_DUPLICATES).assign(keywords="")
+    mock["price"] = mock["price"].str.replace(r"\D", "", regex=True).astype(np.int32)
+    mock["students"] = mock["students"].str.replace(r"\D", "", regex=True).astype(np.int32)
+    mock["rating"] = mock["rating"].astype(float)
+
+    frame = merge_duplicates(pd.concat([mock[generated.columns], generated], ignore_index=True))
+    for column in ["id", "name", "aliases", "niche", "keywords", "url"]:
+        frame[column] = frame[column].astype("string")
+    frame["category"] = pd.Categorical(frame["category"], categories=NICHES)
+    frame["region"] = pd.Categorical(frame["region"], categories=REGIONS)
+    return SchoolCatalog(frame)
+
+
+@functools.lru_cache(maxsize=1)
+def _build_default_catalog():
+    return stub_catalog()
+
+
+def default_catalog():
+    """Общий каталог процесса: строится один раз при первом поиске."""
+    with _DEFAULT_LOCK:
+        return _build_default_catalog()
+
+
+class CatalogSource:
+    """Источник для ``discover``: поиск по локальному каталогу, лучшие ``limit`` школ.
+
+    Школы отдаются в том же виде, что и у внешних источников: цена ``"49,900₽"``,
+    студенты ``"50,000+"``, рейтинг строкой; плюс ``id`` и список ``aliases``.
+    Без ``catalog`` общий каталог процесса строится при первом поиске — в пуле
+    ``discover``, пока остальные источники уже отдают школы.
+    """
+
+    name = "Каталог школ"
+
+    def __init__(self, catalog=None, limit=1000):
+        self.catalog = catalog
+        self.limit = limit
+
+    def search(self, query):
+        catalog = self.catalog or default_catalog()
+        schools = catalog.records(catalog.search(query, self.limit))
+        for school in schools:
+            school["price"] = f"{school['price']:,}₽"
+            school["students"] = f"{school['students']:,}+"
+            school["rating"] = str(school["rating"])
+            school["aliases"] = school["aliases"].split(ALIAS_SEPARATOR) if school["aliases"] else []
+        return schools
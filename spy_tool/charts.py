@@ -0,0 +1,73 @@
+"""Кеш Plotly-фигур по содержимому данных и автоматический переход на WebGL."""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import plotly.express as px
+
+from .metrics import METRICS
+
+# С какого числа точек в таблице линейный график рисуется через WebGL (scattergl)
+WEBGL_THRESHOLD = 1000
+
+
+def _line(frame, **params):
+    render_mode = "webgl" if len(frame) > WEBGL_THRESHOLD else "svg"
+    return px.line(frame, render_mode=render_mode, **params)
+
+
+def _heatmap(frame, x, y, z, **params):
+    # Длинная таблица -> матрица; строки и столбцы в порядке появления в таблице
+    table = frame.pivot_table(index=y, columns=x, values=z, sort=False)
+    return px.imshow(table, aspect="auto", labels={"x": x, "y": y, "color": z}, **params)
+
+
+BUILDERS = {
+    "line": _line,
+    "heatmap": _heatmap,
+    "bar": px.bar,
+    "pie": px.pie,
+}
+
+
+def figure_key(kind, frame, params):
+    """Хеш вида графика, содержимого таблицы и параметров построения."""
+    digest = hashlib.sha1(kind.encode())
+    digest.update(pd.util.hash_pandas_object(frame, index=True).to_numpy().tobytes())
+    digest.update(repr((list(frame.columns), [str(dtype) for dtype in frame.dtypes])).encode())
+    digest.update(repr(sorted(params.items())).encode())
+    return digest.hexdigest()
+
+
+class FigureCache:
+    """LRU готовых фигур: при тех же данных и параметрах фигура не строится заново.
+
+    Возвращаемые фигуры общие для всех сессий, изменять их нельзя.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._figures = OrderedDict()
+        self._lock = threading.Lock()
+
+    def figure(self, kind, frame, **params):
+        key = figure_key(kind, frame, params)
+        with self._lock:
+            figure = self._figures.get(key)
+            if figure is not None:
+                self._figures.move_to_end(key)
+                self.hits += 1
+                return figure
+            self.misses += 1
+
+        with METRICS.span("figure", kind=kind):
+            figure = BUILDERS[kind](frame, **params)
+        with self._lock:
+            self._figures[key] = figure
+            while len(self._figures) > self.max_entries:
+                self._figures.popitem(last=False)
+        return figure
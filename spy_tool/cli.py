@@ -0,0 +1,50 @@
+"""Командная строка: ночной ``precompute`` и фоновый ``refresh`` без браузера."""
+
+import argparse
+import os
+import time
+
+from .discovery import NICHES
+from .pipeline import precompute
+from .refresh import RefreshWorker
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m spy_tool", description="AI Marketing Co-Pilot без интерфейса")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("precompute", help="Поиск, анализ и креативы по нишам с сохранением в общее хранилище")
+    run.add_argument("--niche", action="append", choices=NICHES, help="ниша (можно несколько раз); по умолчанию — все")
+    run.add_argument("--workers", type=int, default=os.cpu_count(), help="число процессов (по умолчанию — по числу ядер)")
+    run.add_argument("--course", default="", help="название вашего курса для креативов")
+    run.add_argument("--price", default="", help="цена вашего курса")
+    run.add_argument("--usp", default="", help="ваше УТП")
+    run.add_argument("--top", type=int, default=20, help="сколько первых школ каждой ниши анализировать")
+
+    refresh = commands.add_parser("refresh", help="Фоновое обновление снимков: самые запрашиваемые школы — первыми")
+    refresh.add_argument("--interval", type=float, default=60, help="пауза между циклами, с")
+    refresh.add_argument("--limit", type=int, default=100, help="сколько самых запрашиваемых школ обновлять за цикл")
+    refresh.add_argument("--queries", type=int, default=20, help="сколько самых частых поисковых запросов обновлять за цикл")
+    refresh.add_argument("--once", action="store_true", help="один цикл и выход (например, из cron)")
+
+    args = parser.parse_args(argv)
+    started = time.monotonic()
+    if args.command == "precompute":
+        found = precompute(
+            args.niche, args.workers, args.course, args.price, args.usp,
+            on_event=lambda message: print(message, flush=True), top=args.top,
+        )
+        print(f"Готово: ниш {len(found)} за {time.monotonic() - started:.1f} с")
+    elif args.command == "refresh":
+        worker = RefreshWorker(limit=args.limit, queries=args.queries, on_event=lambda message: print(message, flush=True))
+        if args.once:
+            print(f"Обновлено снимков: {worker.run_once()} за {time.monotonic() - started:.1f} с")
+        else:
+            try:
+                worker.run_forever(args.interval)
+            except KeyboardInterrupt:
+                pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Колонки в файлах, которые только дописываются: общая основа ``SeriesStore`` и ``PostStore``.
+
+Каталог хранит по файлу на колонку, файл ``rows`` с числом записанных строк и
+файл блокировки. Хранилища пишут и приложение, и фоновое обновление из другого
+процесса, поэтому запись идёт под ``fcntl.flock``: проверка последнего времени и
+дозапись — одна операция. Счётчик ``rows`` сдвигается только после записи всех
+колонок, так что читатель видит колонки одной длины даже посреди чужой записи.
+"""
+
+import fcntl
+import os
+from contextlib import contextmanager
+
+import numpy as np
+
+ROWS_FILE = "rows"
+LOCK_FILE = "lock"
+
+
+@contextmanager
+def locked(directory):
+    """Эксклюзивная блокировка каталога между процессами и потоками."""
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / LOCK_FILE, "ab") as file:
+        fcntl.flock(file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(file, fcntl.LOCK_UN)
+
+
+def committed_rows(directory, columns):
+    """Число целиком записанных строк; ``columns`` — ``{файл: dtype}``.
+
+    У каталогов, записанных до появления ``rows``, — длина самой короткой колонки.
+    """
+    try:
+        return int((directory / ROWS_FILE).read_text())
+    except FileNotFoundError:
+        sizes = [
+            (directory / name).stat().st_size // np.dtype(dtype).itemsize if (directory / name).exists() else 0
+            for name, dtype in columns.items()
+        ]
+        return min(sizes)
+
+
+def read_column(directory, name, dtype, rows):
+    """Первые ``rows`` значений колонки через ``np.memmap``."""
+    if not rows:
+        return np.empty(0, dtype)
+    return np.memmap(directory / name, dtype=dtype, mode="r", shape=(rows,))
+
+
+def append_columns(directory, columns, rows):
+    """Дописывает строки к колонкам каталога с ``rows`` записанными строками; вызывать под ``locked``.
+
+    ``columns`` — ``{файл: массив нужного dtype}``, все одной длины. Хвост, оставшийся
+    от прерванной записи, сначала обрезается. Возвращает новое число строк.
+    """
+    added = len(next(iter(columns.values())))
+    for name, values in columns.items():
+        with open(directory / name, "ab") as file:
+            file.truncate(rows * values.dtype.itemsize)
+            file.write(values.tobytes())
+    # Новые строки становятся видны читателям одной атомарной заменой файла
+    temporary = directory / f"{ROWS_FILE}.tmp"
+    temporary.write_text(str(rows + added))
+    os.replace(temporary, directory / ROWS_FILE)
+    return rows + added
@@ -0,0 +1,122 @@
+"""Сравнение выбранных школ: ключевые метрики бок о бок, место и цветовая шкала."""
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from .timeseries import HOUR
+
+# Метрика: (подпись, больше — значит сильнее конкурент, формат)
+COMPARISON_METRICS = {
+    "price": ("Цена", False, "{:,.0f} ₽"),
+    "rating": ("Рейтинг", True, "{:.1f}"),
+    "students": ("Студентов", True, "{:,.0f}+"),
+    "reviews": ("Отзывов", True, "{:,.0f}"),
+    "positive": ("Позитивных, %", True, "{:.1f}"),
+    "ads": ("Реклама в час", True, "{:.1f}"),
+    "frequency": ("Постов в день", True, "{:.1f}"),
+    "er": ("ER, %", True, "{:.2f}"),
+}
+# Рекламная активность — средняя за последние дни
+ACTIVITY_WINDOW_DAYS = 30
+# Шкала от самого слабого к самому сильному: красный -> белый -> зелёный (RGB)
+COLOUR_SCALE = np.array([[254, 202, 202], [255, 255, 255], [187, 247, 208]], dtype=np.float64)
+
+
+def _reviews_frame(results):
+    return pd.DataFrame.from_dict({
+        school_id: {
+            "reviews": school.get("reviews", {}).get("total"),
+            "positive": school.get("reviews", {}).get("sentiment", {}).get("Позитивные"),
+        }
+        for school_id, school in results.items()
+    }, orient="index", columns=["reviews", "positive"], dtype="float64")
+
+
+def _social_frame(results):
+    # Длинная таблица (школа, соцсеть) -> по школе: частоты складываются, ER взвешивается по числу постов
+    rows = [
+        (school_id, network["posts"], network["frequency"], network["er"])
+        for school_id, school in results.items()
+        for network in school.get("social", {}).get("networks", {}).values()
+    ]
+    networks = pd.DataFrame(rows, columns=["id", "posts", "frequency", "er"]).astype({"id": "object"})
+    networks["er_posts"] = networks["er"] * networks["posts"]
+    grouped = networks.groupby("id")[["posts", "frequency", "er_posts"]].sum()
+    return pd.DataFrame({
+        "frequency": grouped["frequency"],
+        "er": grouped["er_posts"] / grouped["posts"].where(grouped["posts"] > 0),
+    }, dtype="float64")
+
+
+def _activity_frame(store, ids, now, days=ACTIVITY_WINDOW_DAYS):
+    # Точки всех школ в один массив с номером школы — среднее считается одним bincount
+    values = [store.query(school_id, "ads", now - days * 24 * HOUR, now)[1] for school_id in ids]
+    owners = np.repeat(np.arange(len(ids)), [len(school) for school in values])
+    points = np.concatenate(values) if values else np.empty(0)
+    sums = np.bincount(owners, weights=points, minlength=len(ids))
+    counts = np.bincount(owners, minlength=len(ids))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.where(counts > 0, sums / counts, np.nan)
+    return pd.DataFrame({"ads": means}, index=pd.Index(ids, dtype="object"))
+
+
+def _strength(matrix):
+    """Метрики как float-матрица, где больше всегда значит «сильнее» (цена перевёрнута)."""
+    values = matrix[list(COMPARISON_METRICS)].astype("Float64").to_numpy(dtype=np.float64, na_value=np.nan)
+    signs = np.array([1.0 if higher else -1.0 for _, higher, _ in COMPARISON_METRICS.values()])
+    return values * signs
+
+
+def comparison_frame(schools, results, series_store, now=None):
+    """Матрица сравнения: строка на школу, колонки ``COMPARISON_METRICS`` и ``place``.
+
+    ``schools`` — таблица ``spy_tool.schools.schools_frame`` (индекс — ``id``),
+    ``results`` — ``{id: результаты сборщиков}``. Таблицы по источникам собираются
+    векторно и сводятся к школам одним ``join``. Место — по среднему процентильному
+    рангу метрик (пропуски не считаются), лучшие — сверху.
+    """
+    now = now or int(time.time())
+    ids = list(schools.index)
+    results = {school_id: results.get(school_id, {}) for school_id in ids}
+    base = schools[["name", "price", "students", "rating"]]
+    matrix = base.join([_reviews_frame(results), _social_frame(results), _activity_frame(series_store, ids, now)])
+
+    ranks = pd.DataFrame(_strength(matrix), index=matrix.index).rank(pct=True)
+    score = ranks.mean(axis=1)
+    matrix.insert(0, "place", score.rank(ascending=False, method="min").astype("Int64"))
+    return matrix.sort_values(["place", "name"])
+
+
+def scale_colours(matrix):
+    """CSS-фон ячеек метрик: по каждой колонке от красного (слабейший) через белый к зелёному.
+
+    Цвета интерполируются numpy по всей матрице сразу, без matplotlib.
+    """
+    strength = _strength(matrix)
+    # fmin/fmax пропускают NaN, а колонка из одних пропусков даёт NaN без предупреждения
+    low, high = np.fmin.reduce(strength, axis=0), np.fmax.reduce(strength, axis=0)
+    spread = high - low
+    # Колонка из одинаковых значений — вся белая
+    position = np.where(spread > 0, (strength - low) / np.where(spread > 0, spread, 1), 0.5) * (len(COLOUR_SCALE) - 1)
+    position = np.nan_to_num(position, nan=0.5 * (len(COLOUR_SCALE) - 1))
+    lower = np.clip(np.floor(position).astype(np.int64), 0, len(COLOUR_SCALE) - 2)
+    fraction = (position - lower)[..., None]
+    rgb = np.rint(COLOUR_SCALE[lower] + (COLOUR_SCALE[lower + 1] - COLOUR_SCALE[lower]) * fraction).astype(np.int64)
+    codes = rgb[..., 0] << 16 | rgb[..., 1] << 8 | rgb[..., 2]
+    css = np.char.mod("background-color: #%06x", codes)
+    css[np.isnan(strength)] = ""
+    return pd.DataFrame(css, index=matrix.index, columns=list(COMPARISON_METRICS))
+
+
+def comparison_table(matrix):
+    """Матрица для ``st.dataframe``: подписи колонок, форматы и цветовая шкала (pandas ``Styler``)."""
+    labels = {metric: label for metric, (label, _, _) in COMPARISON_METRICS.items()}
+    colours = scale_colours(matrix).rename(columns=labels)
+    table = matrix[["place", "name", *COMPARISON_METRICS]].rename(
+        columns={"place": "Место", "name": "Школа", **labels}
+    )
+    return table.style.apply(lambda _: colours, axis=None, subset=list(labels.values())).format(
+        {label: fmt for label, _, fmt in COMPARISON_METRICS.values()}, na_rep="—"
+    )
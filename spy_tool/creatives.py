@@ -0,0 +1,242 @@
+"""Генерация креативов: промпты, подключаемый бэкенд, пакетный запуск и кеш."""
+
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+
+from .metrics import METRICS
+
+CREATIVE_TYPES = ["Пост для VK", "Instagram пост", "Stories", "Рекламное объявление", "Email письмо"]
+
+
+@dataclass(frozen=True)
+class CreativePrompt:
+    """Всё, от чего зависит результат генерации; одинаковые промпты равны и хешируются."""
+    creative_type: str
+    course: str
+    price: str
+    usp: str
+    competitor: str
+    competitor_price: str
+
+    @property
+    def text(self):
+        return (
+            f"Ты маркетолог онлайн-школы. Подготовь три креатива формата «{self.creative_type}» "
+            f"для курса «{self.course}» по цене {self.price}. Наше УТП: {self.usp or 'не указано'}. "
+            f"Главный конкурент — {self.competitor}, его цена {self.competitor_price}: "
+            "1) бьём конкурента по цене, 2) закрываем его слабое место — трудоустройство, "
+            "3) перенимаем его сильный формат — кейсы студентов. "
+            "Каждый креатив — блок из четырёх строк: название, «Заголовок: ...», "
+            "«Описание: ...», «Инсайт: ...»; блоки раздели пустой строкой."
+        )
+
+
+_FIELDS = {"Заголовок:": "headline", "Описание:": "description", "Инсайт:": "insight"}
+
+
+def parse_creatives(text):
+    """Разбирает ответ бэкенда в список карточек креативов.
+
+    Подходит и для недописанного ответа: последняя карточка будет неполной,
+    поэтому по мере прихода токенов карточки можно перерисовывать.
+    """
+    creatives = []
+    for block in re.split(r"\n\s*\n", text.strip()):
+        lines = [line.strip() for line in block.splitlines() if line.strip()]
+        if not lines:
+            continue
+        creative = {"title": lines[0], "headline": "", "description": "", "insight": ""}
+        for line in lines[1:]:
+            for prefix, field in _FIELDS.items():
+                if line.startswith(prefix):
+                    creative[field] = line[len(prefix):].strip()
+        creatives.append(creative)
+    return creatives
+
+
+# Призыв к действию под формат креатива
+_CALLS_TO_ACTION = {
+    "Пост для VK": "Пишите «ХОЧУ» в комментариях!",
+    "Instagram пост": "Ссылка на программу — в профиле.",
+    "Stories": "Свайп вверх, чтобы забронировать место.",
+    "Рекламное объявление": "Запишитесь на бесплатный урок.",
+    "Email письмо": "Ответьте на это письмо — пришлём программу.",
+}
+
+
+class StubBackend:
+    """Локальный бэкенд: заполняет шаблоны, имитируя задержки модели.
+
+    Бэкенд — любой объект с методами ``stream(prompt)``, отдающим текст ответа
+    по токенам, и ``generate(prompt) -> str`` (формат см. в ``CreativePrompt.text``).
+    """
+
+    def __init__(self, first_token_latency=0.3, token_delay=0.002):
+        self.first_token_latency = first_token_latency
+        self.token_delay = token_delay
+
+    def generate(self, prompt):
+        return "".join(self.stream(prompt))
+
+    def stream(self, prompt):
+        time.sleep(self.first_token_latency)
+        for token in re.findall(r"\S+\s*", self._render(prompt)):
+            yield token
+            if self.token_delay:
+                time.sleep(self.token_delay)
+
+    def _render(self, prompt):
+        cta = _CALLS_TO_ACTION.get(prompt.creative_type, "")
+        creatives = [
+            {
+                "title": f"🔥 {prompt.creative_type} #1: Бьем конкурентов по цене",
+                "headline": f"{prompt.course} - результат как у {prompt.competitor}, но на 30% дешевле!",
+                "description": f"Пока {prompt.competitor} берет {prompt.competitor_price}, ты получаешь тот же результат за {prompt.price}. Почему переплачивать? {cta}",
+                "insight": f"💡 Основано на жалобах клиентов {prompt.competitor} на высокую цену"
+            },
+            {
+                "title": f"⭐ {prompt.creative_type} #2: Решаем их слабое место",
+                "headline": "Гарантируем трудоустройство или возвращаем 100% денег",
+                "description": f"В отличие от других школ, мы не бросаем студентов после курса. Персональная помощь с поиском работы в течение 6 месяцев. {cta}",
+                "insight": f"💡 Основано на жалобах клиентов {prompt.competitor} на слабую поддержку трудоустройства"
+            },
+            {
+                "title": f"🎯 {prompt.creative_type} #3: Копируем их сильные стороны",
+                "headline": f"Кейс студента: +300% к продажам за месяц (как у {prompt.competitor})",
+                "description": f"Тот же результат, что показывают в {prompt.competitor}, но с персональным ментором и современными кейсами. {cta}",
+                "insight": "💡 Основано на самом популярном формате контента конкурентов"
+            },
+        ]
+        return "\n\n".join(
+            f"{creative['title']}\n"
+            f"Заголовок: {creative['headline']}\n"
+            f"Описание: {creative['description']}\n"
+            f"Инсайт: {creative['insight']}"
+            for creative in creatives
+        )
+
+
+def creative_recommendations(competitor):
+    """Рекомендации к креативам против конкурента: раздел -> пункты."""
+    return {
+        "✅ Используйте в креативах:": [
+            "Кейсы с конкретными цифрами",
+            'Формат "до/после"',
+            "Акцент на гарантии результата",
+            "Сравнение с конкурентами",
+        ],
+        "🎯 Оптимальная стратегия:": [
+            f"Цена на 20-30% ниже {competitor}",
+            "Акцент на персональную поддержку",
+            "Современные кейсы этого года",
+            "Гарантия трудоустройства",
+        ],
+        "📱 Площадки для запуска:": [
+            "VK: кейсы студентов",
+            "Instagram: до/после результаты",
+            "Facebook: длинные посты с историями",
+        ],
+    }
+
+
+@dataclass
+class CreativeResult:
+    prompt: CreativePrompt
+    creatives: list = None
+    error: str = None
+
+
+def generate_batch(prompts, backend, max_concurrency=32):
+    """Генерирует креативы для ``prompts`` параллельно и отдаёт ``CreativeResult`` по готовности.
+
+    Одинаковые промпты схлопываются в один вызов бэкенда, поэтому результатов
+    может быть меньше, чем промптов: сопоставляйте их по ``result.prompt``.
+    Одновременно к бэкенду идёт не больше ``max_concurrency`` запросов.
+    """
+    unique = list(dict.fromkeys(prompts))
+    if not unique:
+        return
+    METRICS.count("llm_calls", len(unique))
+    executor = ThreadPoolExecutor(max_workers=min(max_concurrency, len(unique)))
+    try:
+        futures = {executor.submit(backend.generate, prompt): prompt for prompt in unique}
+        for future in as_completed(futures):
+            prompt = futures[future]
+            try:
+                yield CreativeResult(prompt, parse_creatives(future.result()))
+            except Exception as exc:
+                yield CreativeResult(prompt, error=str(exc) or type(exc).__name__)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _normalize(value):
+    return " ".join(str(value).split()).casefold()
+
+
+def creative_key(prompt, analysis_version=""):
+    """Ключ кеша: входы без разницы в регистре и пробелах, цены — только цифры."""
+    return (
+        _normalize(prompt.creative_type),
+        _normalize(prompt.course),
+        re.sub(r"\D", "", prompt.price),
+        _normalize(prompt.usp),
+        _normalize(prompt.competitor),
+        re.sub(r"\D", "", prompt.competitor_price),
+        analysis_version,
+    )
+
+
+class CreativeCache:
+    """LRU готовых креативов с счётчиками попаданий и промахов.
+
+    С ``store`` (см. ``spy_tool.store.ResultStore``) промахи памяти ищутся в общем
+    хранилище, куда креативы заранее складывает ``python -m spy_tool precompute``.
+    В хранилище остаются только ``max_stored`` последних записанных креативов.
+    """
+
+    def __init__(self, max_entries=1024, store=None, max_stored=50000):
+        self.max_entries = max_entries
+        self.store = store
+        self.max_stored = max_stored
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, prompt, analysis_version=""):
+        key = creative_key(prompt, analysis_version)
+        with self._lock:
+            creatives = self._entries.get(key)
+            if creatives is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return creatives
+
+        stored = self.store.get("creatives", json.dumps(key, ensure_ascii=False)) if self.store else None
+        with self._lock:
+            if stored is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, stored[1])
+            return stored[1]
+
+    def put(self, prompt, creatives, analysis_version=""):
+        key = creative_key(prompt, analysis_version)
+        with self._lock:
+            self._remember(key, creatives)
+        if self.store:
+            self.store.put("creatives", json.dumps(key, ensure_ascii=False), creatives)
+            self.store.prune("creatives", self.max_stored)
+
+    def _remember(self, key, creatives):
+        self._entries[key] = creatives
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
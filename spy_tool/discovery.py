@@ -0,0 +1,198 @@
+"""Поиск конкурентов: параллельный опрос источников с потоковой выдачей."""
+
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+
+from .mock_data import MOCK_DUPLICATES, MOCK_SCHOOLS
+from .text import stems
+
+
+NICHES = [
+    "Digital-маркетинг & SMM",
+    "Программирование & IT",
+    "Дизайн & Графика",
+    "Бизнес & Предпринимательство",
+    "Психология & Личностный рост",
+    "Языки & Лингвистика",
+    "Фитнес & Здоровье",
+    "Финансы & Инвестиции",
+    "Кулинария & Хобби",
+    "Красота & Стиль"
+]
+REGIONS = ["Россия", "СНГ", "Весь мир"]
+# Границы ползунка цены и его начальное положение: запрос по умолчанию совпадает с формой поиска,
+# поэтому снимки ночного прогона и фонового обновления попадают в обычный поиск
+PRICE_LIMITS = (5000, 200000)
+DEFAULT_PRICE_RANGE = (20000, 80000)
+SCHOOL_SIZES = ["Любой", "Стартап (до 1000 студентов)", "Средняя (1000-10000)", "Крупная (10000+)"]
+
+# Размер школы -> полуинтервал числа студентов [от, до); None — без границы
+SIZE_RANGES = {
+    "Любой": (None, None),
+    "Стартап (до 1000 студентов)": (None, 1000),
+    "Средняя (1000-10000)": (1000, 10000),
+    "Крупная (10000+)": (10000, None),
+}
+# Выбранный регион -> регионы работы школ, которые в него попадают; None — любые
+REGION_SCOPES = {
+    "Россия": ["Россия"],
+    "СНГ": ["Россия", "СНГ"],
+    "Весь мир": None,
+}
+
+
+@dataclass(frozen=True)
+class SearchQuery:
+    niche: str
+    keywords: str = ""
+    region: str = "Россия"
+    school_size: str = "Любой"
+    price_range: tuple = DEFAULT_PRICE_RANGE
+
+    @property
+    def fields(self):
+        """Поля запроса как их ввёл пользователь, для JSON; обратно — ``from_fields``."""
+        fields = asdict(self)
+        fields["price_range"] = list(self.price_range)
+        return fields
+
+    @classmethod
+    def from_fields(cls, fields):
+        return cls(**{**fields, "price_range": tuple(fields["price_range"])})
+
+    @property
+    def key(self):
+        """Ключ снимка выдачи: одинаковые по смыслу запросы дают один ключ.
+
+        Ключ только для поиска снимка: ключевые слова в нём уже сведены к основам,
+        и запрос из него не восстановить — для этого есть ``fields``.
+        """
+        fields = self.fields
+        fields["keywords"] = " ".join(stems(self.keywords))
+        return json.dumps(fields, ensure_ascii=False, sort_keys=True)
+
+
+def _number(value):
+    # "49,900₽" -> 49900; числа пропускаем как есть
+    if isinstance(value, (int, float)):
+        return value
+    digits = re.sub(r"\D", "", str(value))
+    return int(digits) if digits else None
+
+
+def matches_query(school, query):
+    """Подходит ли школа под фильтры поиска — для источников без собственного поиска.
+
+    Ключевые слова сравниваются по основам: достаточно совпадения любого слова.
+    Неизвестные у школы поля (регион, цена) фильтр не отсекают.
+    """
+    if school.get("category", query.niche) != query.niche:
+        return False
+
+    price = _number(school.get("price"))
+    if price is not None and not query.price_range[0] <= price <= query.price_range[1]:
+        return False
+
+    low, high = SIZE_RANGES.get(query.school_size, (None, None))
+    students = _number(school.get("students"))
+    if students is not None and ((low is not None and students < low) or (high is not None and students >= high)):
+        return False
+
+    regions = REGION_SCOPES.get(query.region)
+    if regions is not None and school.get("region", regions[0]) not in regions:
+        return False
+
+    wanted = set(stems(query.keywords))
+    if wanted:
+        text = " ".join(str(school.get(field, "")) for field in ("name", "niche", "category"))
+        return bool(wanted & set(stems(text)))
+    return True
+
+@dataclass
+class DiscoveryUpdate:
+    """Результат одного источника: только новые школы и общий прогресс."""
+    source: str
+    schools: list
+    done: int
+    total: int
+    error: str = None
+
+
+@dataclass
+class StubSource:
+    """Локальный источник для разработки и тестов: отдаёт школы из списка, подходящие под запрос.
+
+    Источник — любой объект с атрибутом ``name`` и методом ``search(query)``,
+    возвращающим список словарей школ.
+    """
+    name: str
+    schools: list = field(default_factory=list)
+    delay: float = 0.0
+
+    def search(self, query):
+        if self.delay:
+            time.sleep(self.delay)
+        return [dict(school) for school in self.schools if matches_query(school, query)]
+
+
+def default_sources(catalog=None):
+    """Локальный каталог школ плюс внешние источники.
+
+    ``catalog`` — ``spy_tool.catalog.SchoolCatalog``; без него берётся общий
+    каталог процесса, и строится он уже внутри поиска, не задерживая другие
+    источники. Импорт ленивый: каталог тянет numpy и pandas.
+    """
+    from .catalog import CatalogSource
+
+    # Пока реальных внешних источников нет, делим мок-данные между тремя заглушками
+    # с разной задержкой, чтобы выдача приходила частями
+    return [
+        CatalogSource(catalog),
+        StubSource("Каталоги курсов", MOCK_SCHOOLS[:3], delay=0.05),
+        StubSource("Поисковая выдача", MOCK_SCHOOLS[2:6] + MOCK_DUPLICATES[:2], delay=0.15),
+        StubSource("Агрегаторы отзывов", MOCK_SCHOOLS[5:] + MOCK_DUPLICATES[2:], delay=0.3),
+    ]
+
+
+def discover(query, sources, max_workers=None):
+    """Опрашивает ``sources`` параллельно и отдаёт ``DiscoveryUpdate`` по мере готовности.
+
+    Школы дедуплицируются по ``url``: повторно найденная школа в выдачу не попадает.
+    Одну школу под разными названиями и адресами сводит уже ``spy_tool.resolve``
+    по всей выдаче. Ошибка одного источника не прерывает поиск, а попадает в ``update.error``.
+    """
+    total = len(sources)
+    seen = set()
+    executor = ThreadPoolExecutor(max_workers=max_workers or total or 1)
+    try:
+        futures = {executor.submit(source.search, query): source for source in sources}
+        for done, future in enumerate(as_completed(futures), start=1):
+            source = futures[future]
+            try:
+                found = future.result()
+            except Exception as exc:
+                yield DiscoveryUpdate(source.name, [], done, total, error=str(exc))
+                continue
+
+            new_schools = []
+            for school in found:
+                if school["url"] not in seen:
+                    seen.add(school["url"])
+                    new_schools.append(school)
+            yield DiscoveryUpdate(source.name, new_schools, done, total)
+    finally:
+        # Если потребитель бросил генератор раньше, не ждём оставшиеся источники
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def load_snapshot(store, query):
+    """Последняя сохранённая выдача по запросу: ``(stored_at, schools)`` или ``None``."""
+    stored = store.get("search", query.key)
+    return None if stored is None else (stored[0], stored[1]["schools"])
+
+
+def save_snapshot(store, query, schools):
+    store.put("search", query.key, {"schools": schools})
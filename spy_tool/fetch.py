@@ -0,0 +1,204 @@
+"""Общий слой HTTP для сборщиков: пул соединений, лимиты по хостам, повторы и кеш с 304."""
+
+import json
+import random
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+
+from .metrics import METRICS
+from .settings import DATA_DIR
+from .store import connect
+
+# Ответы, после которых есть смысл повторить запрос
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Заголовки ответа, которые сохраняем вместе с телом
+CACHED_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+MB = 2 ** 20
+
+
+@dataclass
+class FetchResult:
+    """Ответ сервера или, при 304, сохранённая копия (``from_cache=True``)."""
+    url: str
+    status: int
+    headers: dict = field(default_factory=dict)
+    content: bytes = b""
+    from_cache: bool = False
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class HttpCache:
+    """Тела ответов с валидаторами (ETag, Last-Modified) в SQLite, ключ — полный URL.
+
+    Суммарный размер тел не больше ``max_bytes``: сверх него вытесняются ответы,
+    которые дольше всех не сохранялись и не подтверждались через 304.
+    """
+
+    def __init__(self, path=None, max_bytes=256 * MB):
+        self.path = path or DATA_DIR / "http.sqlite"
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db = connect(self.path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS http_cache ("
+            " url TEXT PRIMARY KEY, stored_at REAL NOT NULL, headers TEXT NOT NULL, body BLOB NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS http_cache_stored ON http_cache (stored_at)")
+        self._db.commit()
+
+    def get(self, url):
+        with self._lock:
+            row = self._db.execute("SELECT headers, body FROM http_cache WHERE url = ?", (url,)).fetchone()
+        return None if row is None else (json.loads(row[0]), bytes(row[1]))
+
+    def put(self, url, headers, body, now=None):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO http_cache VALUES (?, ?, ?, ?)",
+                (url, now or time.time(), json.dumps(headers), sqlite3.Binary(body)),
+            )
+            self._evict()
+            self._db.commit()
+
+    def touch(self, url, now=None):
+        with self._lock:
+            self._db.execute("UPDATE http_cache SET stored_at = ? WHERE url = ?", (now or time.time(), url))
+            self._db.commit()
+
+    def _evict(self):
+        # Оставляем самые свежие ответы, пока их суммарный размер укладывается в лимит
+        self._db.execute(
+            "DELETE FROM http_cache WHERE url IN (SELECT url FROM ("
+            " SELECT url, SUM(length(body)) OVER (ORDER BY stored_at DESC, url) AS kept FROM http_cache"
+            ") WHERE kept > ?)",
+            (self.max_bytes,),
+        )
+
+
+class HostLimiter:
+    """Не больше ``concurrency`` одновременных запросов и ``rate`` запросов в секунду к одному хосту."""
+
+    def __init__(self, concurrency=4, rate=5.0):
+        self.rate = rate
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._lock = threading.Lock()
+        self._next_at = 0.0
+
+    def __enter__(self):
+        self._slots.acquire()
+        if self.rate:
+            with self._lock:
+                now = time.monotonic()
+                start_at = max(now, self._next_at)
+                self._next_at = start_at + 1 / self.rate
+            time.sleep(start_at - now)
+        return self
+
+    def __exit__(self, *exc_info):
+        self._slots.release()
+
+
+class Fetcher:
+    """GET с пулом соединений ``requests.Session``, лимитами по хостам, повторами и HTTP-кешем.
+
+    Повторный запрос к закешированному URL уходит условным (If-None-Match /
+    If-Modified-Since); на 304 отдаётся сохранённое тело. Сжатие — всё, что умеет
+    urllib3 в этом окружении: gzip и deflate всегда, brotli — если установлен пакет.
+    ``host_limits`` задаёт ``{хост: (одновременно, в секунду)}`` в обход умолчаний.
+    """
+
+    def __init__(self, cache=None, concurrency=4, rate=5.0, host_limits=None, retries=3, backoff=0.5,
+                 timeout=10.0, pool_size=32, user_agent="spy-tool/3.0"):
+        self.cache = cache or HttpCache()
+        self.concurrency = concurrency
+        self.rate = rate
+        self.host_limits = host_limits or {}
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.stats = {"requests": 0, "not_modified": 0, "retries": 0, "errors": 0}
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"User-Agent": user_agent, "Accept-Encoding": ACCEPT_ENCODING})
+
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def limiter(self, host):
+        with self._lock:
+            if host not in self._limiters:
+                concurrency, rate = self.host_limits.get(host, (self.concurrency, self.rate))
+                self._limiters[host] = HostLimiter(concurrency, rate)
+            return self._limiters[host]
+
+    def get(self, url, params=None, headers=None):
+        url = requests.Request("GET", url, params=params).prepare().url
+        headers = dict(headers or {})
+        cached = self.cache.get(url)
+        if cached:
+            cached_headers, _ = cached
+            if "ETag" in cached_headers:
+                headers["If-None-Match"] = cached_headers["ETag"]
+            if "Last-Modified" in cached_headers:
+                headers["If-Modified-Since"] = cached_headers["Last-Modified"]
+
+        response = self._request(url, headers)
+        if response.status_code == 304 and cached:
+            self._count("not_modified")
+            self.cache.touch(url)
+            return FetchResult(url, 200, cached[0], cached[1], from_cache=True)
+
+        result = FetchResult(url, response.status_code, dict(response.headers), response.content)
+        if response.status_code == 200 and ("ETag" in response.headers or "Last-Modified" in response.headers):
+            self.cache.put(url, {key: response.headers[key] for key in CACHED_HEADERS if key in response.headers},
+                           response.content)
+        return result
+
+    def _request(self, url, headers):
+        limiter = self.limiter(urlsplit(url).netloc)
+        for attempt in range(self.retries + 1):
+            self._count("requests")
+            try:
+                with limiter:
+                    response = self.session.get(url, headers=headers, timeout=self.timeout)
+                    # Тело дочитываем под лимитом, чтобы соединение вернулось в пул
+                    response.content
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == self.retries:
+                    self._count("errors")
+                    raise
+                delay = None
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                    return response
+                delay = _retry_after(response)
+
+            self._count("retries")
+            # Полный джиттер: повторы от многих потоков не приходят на сервер одной волной
+            time.sleep(delay if delay is not None else random.uniform(0, self.backoff * 2 ** attempt))
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+        METRICS.count("http", event=name)
+
+
+def _retry_after(response):
+    value = response.headers.get("Retry-After", "")
+    return min(float(value), 60.0) if value.replace(".", "", 1).isdigit() else None
@@ -0,0 +1,188 @@
+"""Лёгкая телеметрия: отрезки времени по этапам, счётчики внешних вызовов и их выгрузка.
+
+Отрезки и счётчики копятся на весь процесс; отрезки, закрытые в потоке скрипта,
+попадают ещё и в ``Trace`` текущего перезапуска. Выгрузка — JSON-строка на
+перезапуск в логгер ``spy_tool.metrics`` и текст в формате Prometheus.
+"""
+
+import cProfile
+import io
+import json
+import logging
+import pstats
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Сколько строк профиля показывать: самые дорогие функции по накопленному времени
+PROFILE_LINES = 25
+
+
+class Trace:
+    """Отрезки одного перезапуска скрипта в порядке завершения; с ``profile`` — ещё и профиль cProfile.
+
+    У отрезка ``offset`` — когда он начался от начала перезапуска, ``depth`` — вложенность.
+    """
+
+    def __init__(self, context=None, profile=False):
+        self.context = context or {}
+        self.started = time.time()
+        self.last_at = self.started
+        self.finished_at = None
+        self.spans = []
+        self.depth = 0
+        self.profile_text = None
+        self._profile = None
+        if profile:
+            self._profile = cProfile.Profile()
+            try:
+                self._profile.enable()
+            except ValueError:
+                # Профилировщик уже работает (другая сессия в этом же интерпретаторе) — без профиля
+                self._profile = None
+
+    @property
+    def seconds(self):
+        return (self.finished_at or self.last_at) - self.started
+
+    def add(self, name, labels, started, seconds, depth):
+        self.spans.append({
+            "name": name, "labels": labels, "offset": round(started - self.started, 6),
+            "seconds": round(seconds, 6), "depth": depth,
+        })
+        self.last_at = time.time()
+
+    def finish(self, interrupted=False):
+        """Закрывает перезапуск; прерванный (``st.rerun``) заканчивается на последнем закрытом отрезке."""
+        if self.finished_at is not None:
+            return self
+        self.finished_at = self.last_at if interrupted else time.time()
+        if self._profile is not None:
+            self._profile.disable()
+            out = io.StringIO()
+            pstats.Stats(self._profile, stream=out).sort_stats("cumulative").print_stats(PROFILE_LINES)
+            self.profile_text = out.getvalue()
+            self._profile = None
+        logger.info(json.dumps(self.record(), ensure_ascii=False))
+        return self
+
+    def record(self):
+        return {
+            "event": "rerun", **self.context, "started": round(self.started, 3),
+            "seconds": round(self.seconds, 6), "spans": self.spans,
+        }
+
+
+class Metrics:
+    """Отрезки времени и счётчики на весь процесс, потокобезопасно.
+
+    По каждому отрезку копятся число, сумма и максимум секунд. Объекты со своими
+    счётчиками (кеши, HTTP) подключаются через ``register`` и опрашиваются при выгрузке.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._spans = {}
+        self._counters = {}
+        self._sources = {}
+        self._local = threading.local()
+
+    @contextmanager
+    def span(self, name, **labels):
+        trace = getattr(self._local, "trace", None)
+        depth = 0
+        if trace is not None:
+            depth = trace.depth
+            trace.depth += 1
+        started_at = time.time()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            key = (name, tuple(sorted(labels.items())))
+            with self._lock:
+                stat = self._spans.setdefault(key, [0, 0.0, 0.0])
+                stat[0] += 1
+                stat[1] += seconds
+                stat[2] = max(stat[2], seconds)
+            if trace is not None:
+                trace.depth -= 1
+                trace.add(name, labels, started_at, seconds, depth)
+
+    def count(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def register(self, name, stats):
+        """Подключает источник счётчиков: ``stats()`` возвращает ``{имя: число}``."""
+        with self._lock:
+            self._sources[name] = stats
+
+    def begin(self, profile=False, **context):
+        """Начинает перезапуск в текущем потоке: его отрезки попадут в возвращённый ``Trace``."""
+        self._local.trace = Trace(context, profile)
+        return self._local.trace
+
+    def snapshot(self):
+        """Все отрезки, счётчики и опрошенные источники одним словарём (для JSON)."""
+        with self._lock:
+            spans = [
+                {"name": name, "labels": dict(labels), "count": count, "sum": round(total, 6), "max": round(peak, 6)}
+                for (name, labels), (count, total, peak) in sorted(self._spans.items())
+            ]
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self._counters.items())
+            ]
+            sources = dict(self._sources)
+        return {"spans": spans, "counters": counters, "sources": {name: stats() for name, stats in sources.items()}}
+
+    def prometheus(self, prefix="spy_tool"):
+        """Текстовый формат Prometheus: отрезки — как summary, счётчики — как counter, источники — как gauge."""
+        snapshot = self.snapshot()
+        lines = [f"# TYPE {prefix}_span_seconds summary", f"# TYPE {prefix}_span_seconds_max gauge"]
+        for span in snapshot["spans"]:
+            labels = _labels({"span": span["name"], **span["labels"]})
+            lines.append(f"{prefix}_span_seconds_count{labels} {span['count']}")
+            lines.append(f"{prefix}_span_seconds_sum{labels} {span['sum']}")
+            lines.append(f"{prefix}_span_seconds_max{labels} {span['max']}")
+        for name in dict.fromkeys(counter["name"] for counter in snapshot["counters"]):
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.extend(
+                f"{prefix}_{name}_total{_labels(counter['labels'])} {counter['value']}"
+                for counter in snapshot["counters"] if counter["name"] == name
+            )
+        for source, stats in snapshot["sources"].items():
+            for key, value in stats.items():
+                metric = f"{prefix}_{_metric_name(source)}_{_metric_name(key)}"
+                lines.append(f"# TYPE {metric} gauge")
+                lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _metric_name(text):
+    return re.sub(r"[^a-zA-Z0-9_]", "_", text)
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    escaped = {key: str(value).replace("\\", "\\\\").replace('"', '\\"') for key, value in labels.items()}
+    return "{" + ",".join(f'{_metric_name(key)}="{value}"' for key, value in escaped.items()) + "}"
+
+
+def log_to(path):
+    """Пишет JSON-строки перезапусков в файл ``path`` (по строке на перезапуск)."""
+    handler = logging.FileHandler(path, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+
+
+# Один реестр на процесс: его пишут и ядро, и приложение
+METRICS = Metrics()
@@ -0,0 +1,35 @@
+"""Мок-данные, пока к приложению не подключены реальные источники."""
+
+MOCK_SCHOOLS = [
+    {"name": "Skillbox", "niche": "Дизайн", "price": "49,900₽", "students": "50,000+", "rating": "4.2", "url": "skillbox.ru", "category": "Дизайн & Графика", "region": "Россия"},
+    {"name": "GeekBrains", "niche": "Программирование", "price": "89,900₽", "students": "100,000+", "rating": "4.1", "url": "geekbrains.ru", "category": "Программирование & IT", "region": "Россия"},
+    {"name": "Нетология", "niche": "Маркетинг", "price": "39,900₽", "students": "200,000+", "rating": "4.4", "url": "netology.ru", "category": "Digital-маркетинг & SMM", "region": "Россия"},
+    {"name": "TexTerra", "niche": "Контент-маркетинг", "price": "29,900₽", "students": "5,000+", "rating": "4.7", "url": "texterra.ru", "category": "Digital-маркетинг & SMM", "region": "Россия"},
+    {"name": "Convertmonster", "niche": "Таргетинг", "price": "59,900₽", "students": "15,000+", "rating": "4.5", "url": "convertmonster.ru", "category": "Digital-маркетинг & SMM", "region": "Россия"},
+    {"name": "WebCanape", "niche": "SMM", "price": "24,900₽", "students": "8,000+", "rating": "4.3", "url": "webcanape.ru", "category": "Digital-маркетинг & SMM", "region": "Россия"},
+    {"name": "ProductStar", "niche": "Продуктовый менеджмент", "price": "79,900₽", "students": "25,000+", "rating": "4.6", "url": "productstar.ru", "category": "Бизнес & Предпринимательство", "region": "Россия"},
+    {"name": "Eduson Academy", "niche": "Бизнес", "price": "45,900₽", "students": "12,000+", "rating": "4.0", "url": "eduson.tv", "category": "Бизнес & Предпринимательство", "region": "Россия"}
+]
+
+# Те же школы, как их отдают другие источники: под другим названием или адресом
+MOCK_DUPLICATES = [
+    {"name": "Skillbox Академия", "niche": "Дизайн", "price": "52,900₽", "students": "3,000+", "rating": "4.1", "url": "skillbox.academy", "category": "Дизайн & Графика", "region": "Россия"},
+    {"name": "skillbox.ru", "niche": "Дизайн", "price": "49,900₽", "students": "50,000+", "rating": "4.2", "url": "https://skillbox.ru/design/", "category": "Дизайн & Графика", "region": "Россия"},
+    {"name": "Netology", "niche": "Маркетинг", "price": "39,900₽", "students": "180,000+", "rating": "4.4", "url": "netology-group.ru", "category": "Digital-маркетинг & SMM", "region": "Россия"},
+    {"name": "Онлайн-школа TexTerra", "niche": "Контент-маркетинг", "price": "29,900₽", "students": "5,000+", "rating": "4.6", "url": "https://texterra.ru/education/", "category": "Digital-маркетинг & SMM", "region": "Россия"},
+]
+
+MOCK_TRAFFIC = {
+    "visits": 250000,
+    "sources": {"Поиск": 45, "Реклама": 35, "Прямые": 20},
+    "main_channel": "Facebook + Instagram",
+    "ad_budget": 500000,
+}
+
+MOCK_PRICING = {
+    "offer": "Освой профессию за 4 месяца",
+    "usp": "Гарантия трудоустройства",
+    "installment_months": 12,
+    "max_discount": "до 50% на Black Friday",
+    "average_check": 65000,
+}
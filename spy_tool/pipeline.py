@@ -0,0 +1,102 @@
+"""Пакетный прогон без интерфейса: поиск, анализ и креативы по многим нишам сразу."""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from .analysis import analysis_version, analyze_schools, default_collectors
+from .cache import AnalysisCache
+from .creatives import CREATIVE_TYPES, CreativeCache, CreativePrompt, StubBackend, generate_batch
+from .discovery import NICHES, SearchQuery, default_sources, discover, save_snapshot
+from .resolve import resolve_schools
+from .schools import format_rub, schools_frame
+from .social import PostStore
+from .store import ResultStore
+from .timeseries import SeriesStore
+from .topics import TopicStore
+
+
+def discover_all(query):
+    """Все школы по запросу из всех источников (без интерфейса и потоковой выдачи), дубли слиты."""
+    schools = []
+    for update in discover(query, default_sources()):
+        schools.extend(update.schools)
+    return resolve_schools(schools)
+
+
+def discover_niche(niche):
+    return discover_all(SearchQuery(niche))
+
+
+def analyze_batch(schools):
+    """Анализ части школ в отдельном процессе: хранилища открываются заново в каждом процессе.
+
+    Результаты попадают в общий кеш анализа, поэтому приложение потом берёт их оттуда.
+    """
+    cache = AnalysisCache()
+    collectors = default_collectors(TopicStore(), SeriesStore(), PostStore())
+    analyses = analyze_schools(schools, collectors, cache=cache)
+    return {
+        school_id: {"results": analysis.results, "errors": analysis.errors}
+        for school_id, analysis in analyses.items()
+    }
+
+
+def creative_prompts(school, course, price, usp):
+    return [
+        CreativePrompt(creative_type, course, price, usp, school["name"], format_rub(school["price"]))
+        for creative_type in CREATIVE_TYPES
+    ]
+
+
+def precompute(niches=None, workers=None, course="", price="", usp="", store=None, backend=None, on_event=None,
+               top=20):
+    """Прогоняет поиск, анализ и генерацию креативов по ``niches`` (по умолчанию — по всем).
+
+    Выдача сохраняется целиком, а анализируются и получают креативы первые ``top`` школ ниши.
+
+    Поиск и анализ идут в пуле из ``workers`` процессов (по умолчанию — по числу ядер).
+    Школа, найденная в нескольких нишах, анализируется один раз, а каждая школа
+    достаётся ровно одному процессу, чтобы не собирать её ряды дважды.
+    Креативы генерируются в главном процессе: бэкенд и так ждёт ответа модели, а не
+    считает. Выдача ложится снимком под ключом запроса по умолчанию (как его задаёт
+    форма поиска), анализ и креативы — в свои кеши, откуда их берёт приложение.
+
+    ``on_event(message)`` получает короткие сообщения о ходе прогона.
+    """
+    niches = niches or NICHES
+    workers = workers or os.cpu_count() or 1
+    store = store or ResultStore()
+    backend = backend or StubBackend()
+    on_event = on_event or (lambda message: None)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        found = dict(zip(niches, pool.map(discover_niche, niches)))
+        for niche, schools in found.items():
+            on_event(f"{niche}: найдено школ {len(schools)}")
+            save_snapshot(store, SearchQuery(niche), schools)
+
+        leaders = {niche: schools[:top] for niche, schools in found.items()}
+        unique = list({school["id"]: school for schools in leaders.values() for school in schools}.values())
+        parts = [unique[i::workers] for i in range(workers) if unique[i::workers]]
+        analyses = {}
+        for part in pool.map(analyze_batch, parts):
+            analyses.update(part)
+        on_event(f"Проанализировано школ: {len(analyses)}")
+
+    # Креативы зависят от данных анализа школы, поэтому ключ кеша включает их версию
+    cache = CreativeCache(store=store)
+    prompts = {}
+    for school in schools_frame(unique).to_dict("records"):
+        version = analysis_version(analyses[school["id"]]["results"])
+        for prompt in creative_prompts(school, course, price, usp):
+            prompts[prompt] = (school["id"], version)
+
+    missing = [prompt for prompt, (_, version) in prompts.items() if cache.get(prompt, version) is None]
+    for result in generate_batch(missing, backend):
+        school_id, version = prompts[result.prompt]
+        if result.error:
+            on_event(f"Креатив {result.prompt.creative_type} для {school_id}: {result.error}")
+            continue
+        cache.put(result.prompt, result.creatives, version)
+    on_event(f"Креативов сгенерировано: {len(missing)}, из кеша: {len(prompts) - len(missing)}")
+    return found
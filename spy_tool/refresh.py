@@ -0,0 +1,176 @@
+"""Фоновое обновление снимков: у каждого источника свой интервал, популярные школы — первыми."""
+
+import json
+import threading
+import time
+
+from .analysis import analyze_schools, default_collectors
+from .cache import AnalysisCache
+from .discovery import NICHES, SearchQuery, load_snapshot, save_snapshot
+from .pipeline import discover_all
+from .settings import DATA_DIR
+from .social import PostStore
+from .store import ResultStore, connect
+from .timeseries import SeriesStore
+from .topics import TopicStore
+
+MINUTE = 60
+HOUR = 3600
+
+# Как часто обновлять каждый источник; интервалы короче TTL кеша, чтобы снимок не успевал устареть
+DEFAULT_CADENCES = {
+    "discovery": 6 * HOUR,
+    "traffic": 12 * HOUR,
+    "activity": 30 * MINUTE,
+    "reviews": 3 * HOUR,
+    "social": 90 * MINUTE,
+    "pricing": 12 * HOUR,
+}
+DEFAULT_CADENCE = 3 * HOUR
+
+
+class RequestLog:
+    """Счётчики запросов анализа по школам и поисковых запросов: по ним обновление выбирает, кого освежать первым."""
+
+    def __init__(self, path=None):
+        self.path = path or DATA_DIR / "requests.sqlite"
+        self._lock = threading.Lock()
+        self._db = connect(self.path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS school_requests ("
+            " id TEXT PRIMARY KEY, school TEXT NOT NULL,"
+            " count INTEGER NOT NULL, requested_at REAL NOT NULL)"
+        )
+        # Запрос хранится как его ввёл пользователь: из ключа снимка, где слова уже сведены к основам, его не восстановить
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS search_requests ("
+            " key TEXT PRIMARY KEY, query TEXT NOT NULL,"
+            " count INTEGER NOT NULL, requested_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def record(self, schools, now=None):
+        now = now or time.time()
+        rows = [
+            (school["id"], json.dumps({key: str(school[key]) for key in ("id", "url", "name", "niche") if key in school},
+                                      ensure_ascii=False), now)
+            for school in schools
+        ]
+        with self._lock:
+            self._db.executemany(
+                "INSERT INTO school_requests VALUES (?, ?, 1, ?) ON CONFLICT (id) DO UPDATE SET"
+                " count = count + 1, school = excluded.school, requested_at = excluded.requested_at",
+                rows,
+            )
+            self._db.commit()
+
+    def top(self, limit=100):
+        """Самые запрашиваемые школы: ``[(school, count)]`` по убыванию спроса."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT school, count FROM school_requests ORDER BY count DESC, requested_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [(json.loads(school), count) for school, count in rows]
+
+    def record_query(self, query, now=None):
+        now = now or time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO search_requests VALUES (?, ?, 1, ?) ON CONFLICT (key) DO UPDATE SET"
+                " count = count + 1, query = excluded.query, requested_at = excluded.requested_at",
+                (query.key, json.dumps(query.fields, ensure_ascii=False), now),
+            )
+            self._db.commit()
+
+    def top_queries(self, limit=20):
+        """Самые частые поисковые запросы: ``[(SearchQuery, count)]`` по убыванию спроса."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT query, count FROM search_requests ORDER BY count DESC, requested_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [(SearchQuery.from_fields(json.loads(query)), count) for query, count in rows]
+
+
+class RefreshWorker:
+    """Держит снимки тёплыми отдельно от приложения: ``python -m spy_tool refresh``.
+
+    За цикл обновляются выдачи по нишам и не больше ``queries`` самых частых
+    поисковых запросов, а также не больше ``limit`` самых запрашиваемых школ;
+    у каждой школы — только источники, чей снимок старше своего интервала.
+    Устаревшие снимки выдачи вне этого набора удаляются: их никто не обновит,
+    и приложение лучше сделает живой поиск, чем покажет старую выдачу.
+    """
+
+    def __init__(self, cache=None, log=None, store=None, collectors=None, cadences=None, limit=100,
+                 niches=None, on_event=None, queries=20):
+        self.cache = AnalysisCache() if cache is None else cache
+        self.log = RequestLog() if log is None else log
+        self.store = ResultStore() if store is None else store
+        if collectors is None:
+            collectors = default_collectors(TopicStore(), SeriesStore(), PostStore())
+        self.collectors = collectors
+        self.cadences = {**DEFAULT_CADENCES, **(cadences or {})}
+        self.limit = limit
+        self.queries = queries
+        self.niches = NICHES if niches is None else niches
+        self.on_event = on_event or (lambda message: None)
+
+    def cadence(self, source):
+        return self.cadences.get(source, DEFAULT_CADENCE)
+
+    def due(self, now=None):
+        """План цикла: ``[(school, [source, ...])]`` в порядке убывания спроса."""
+        now = now or time.time()
+        plan = []
+        for school, _ in self.log.top(self.limit):
+            snapshot = self.cache.get(school["id"], now, stale=True)
+            sources = [
+                source for source in self.collectors
+                if source not in snapshot or now - snapshot[source][0] >= self.cadence(source)
+            ]
+            if sources:
+                plan.append((school, sources))
+        return plan
+
+    def run_once(self, now=None):
+        """Один цикл обновления; возвращает число обновлённых снимков."""
+        now = now or time.time()
+        refreshed = 0
+        # Выдачи по нишам плюс самые частые запросы пользователей
+        queries = [SearchQuery(niche) for niche in self.niches]
+        queries += [query for query, _ in self.log.top_queries(self.queries)]
+        queries = {query.key: query for query in queries}
+        for query in queries.values():
+            snapshot = load_snapshot(self.store, query)
+            if snapshot is None or now - snapshot[0] >= self.cadence("discovery"):
+                save_snapshot(self.store, query, discover_all(query))
+                refreshed += 1
+        stale = [key for key in self.store.keys("search", before=now - self.cadence("discovery")) if key not in queries]
+        self.store.delete("search", stale)
+
+        plan = self.due(now)
+        # Пакет на источник: внутри пакета школы параллельно, ошибки не трогают старый снимок
+        for source, collector in self.collectors.items():
+            schools = [school for school, sources in plan if source in sources]
+            if not schools:
+                continue
+            for school_id, analysis in analyze_schools(schools, {source: collector}).items():
+                if source in analysis.results:
+                    self.cache.put(school_id, source, analysis.results[source])
+                    refreshed += 1
+                else:
+                    self.on_event(f"{school_id} / {source}: {analysis.errors.get(source)}")
+        return refreshed
+
+    def run_forever(self, interval=60, stop=None):
+        """Повторяет ``run_once`` раз в ``interval`` секунд, пока не выставлен ``stop`` (``threading.Event``)."""
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            started = time.monotonic()
+            try:
+                refreshed = self.run_once()
+            except Exception as exc:
+                self.on_event(f"Цикл обновления упал: {exc}")
+            else:
+                self.on_event(f"Обновлено снимков: {refreshed} за {time.monotonic() - started:.1f} с")
+            stop.wait(max(interval - (time.monotonic() - started), 0))
@@ -0,0 +1,302 @@
+"""Сведение дублей школ из разных источников: MinHash/LSH по названиям и доменам.
+
+Одна и та же школа приходит под разными названиями и адресами: «Skillbox»,
+«skillbox.ru», «Skillbox Академия» на skillbox.academy. Дубли сливаются в одну
+запись со стабильным ``id`` — регистрируемым доменом школы («skillbox.ru»); по
+нему приложение ведёт выбор школ, кеши и анализ.
+"""
+
+import hashlib
+import re
+from urllib.parse import urlsplit
+
+import numpy as np
+import pandas as pd
+
+from .text import tokenize
+
+SHINGLE = 3
+NUM_PERM = 32
+# 16 полос по 2 значения: в кандидаты попадают пары с похожестью примерно от 0.25,
+# отсеивает их уже точная проверка
+BANDS = 16
+# В корзине LSH больше стольких записей — это общий кусок названия («лог», «акад»), а не дубль
+MAX_BUCKET = 32
+NAME_THRESHOLD = 0.5
+ROOT_SALT = 0x9E3779B97F4A7C15
+
+# Слова, которые не отличают одну школу от другой
+GENERIC_WORDS = {
+    "школа", "онлайн", "академия", "университет", "институт", "курсы", "центр", "платформа",
+    "online", "school", "academy", "university", "courses",
+}
+# Суффиксы, под которыми домены раздаются разным владельцам: школа — следующая метка слева.
+# Кроме составных публичных суффиксов сюда входят платформы, где школы живут на поддоменах
+SHARED_SUFFIXES = {
+    "co.uk", "org.uk", "ac.uk", "com.au", "co.nz", "co.za", "co.jp", "co.kr", "co.il", "co.in",
+    "com.br", "com.cn", "com.tr", "com.ua", "org.ua", "in.ua", "kiev.ua", "com.kz", "org.kz",
+    "com.ru", "net.ru", "org.ru", "pp.ru", "msk.ru", "spb.ru", "com.by",
+    "getcourse.ru", "tilda.ws", "taplink.cc", "skillspace.ru", "antitreningi.ru", "teachbase.ru",
+    "ucoz.ru", "narod.ru", "nethouse.ru", "lpmotor.ru", "notion.site", "github.io", "wixsite.com",
+    "blogspot.com", "wordpress.com", "teachable.com", "thinkific.com", "webflow.io", "netlify.app",
+    "vercel.app",
+}
+DOMAIN_NAME = re.compile(r"(?:https?://)?(?:www\.)?[a-z0-9-]+(?:\.[a-z0-9-]+)+/?")
+TRANSLIT = str.maketrans({
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ж": "zh", "з": "z", "и": "i",
+    "й": "y", "к": "k", "л": "l", "м": "m", "н": "n", "о": "o", "п": "p", "р": "r", "с": "s",
+    "т": "t", "у": "u", "ф": "f", "х": "kh", "ц": "ts", "ч": "ch", "ш": "sh", "щ": "sch", "ъ": "",
+    "ы": "y", "ь": "", "э": "e", "ю": "yu", "я": "ya",
+})
+
+
+def registered_domain(url):
+    """Регистрируемый домен: «https://www.skillbox.ru/courses/» -> «skillbox.ru»,
+    «prana.getcourse.ru» -> «prana.getcourse.ru», «foo.co.uk» -> «foo.co.uk»."""
+    url = str(url or "").strip().lower()
+    host = (urlsplit(url if "//" in url else "//" + url).hostname or "").removeprefix("www.").strip(".")
+    labels = host.split(".")
+    # Под общим суффиксом школа — ещё одна метка слева, иначе — две последние метки
+    size = 3 if ".".join(labels[-2:]) in SHARED_SUFFIXES else 2
+    return ".".join(labels[-size:])
+
+
+def registered_domains(urls):
+    """``registered_domain`` для массива адресов строковыми операциями pandas."""
+    hosts = (
+        pd.Series(urls, dtype="string").fillna("").str.strip().str.lower()
+        .str.replace(r"^[a-z]+://", "", regex=True).str.replace(r"[/?#:].*$", "", regex=True)
+        .str.replace(r"^www\.", "", regex=True).str.strip(".")
+    )
+    last_two = hosts.str.extract(r"([^.]+\.[^.]+)$", expand=False)
+    last_three = hosts.str.extract(r"([^.]+\.[^.]+\.[^.]+)$", expand=False)
+    # Под общим суффиксом школа — ещё одна метка слева, иначе — две последние метки
+    domains = last_two.where(~last_two.isin(SHARED_SUFFIXES), last_three).fillna(hosts)
+    return domains.to_numpy(dtype=object)
+
+
+def domain_labels(domains):
+    """Метка школы в регистрируемом домене: «skillbox.ru» -> «skillbox», «prana.getcourse.ru» -> «prana»."""
+    return pd.Series(domains, dtype="string").str.extract(r"^([^.]*)", expand=False).fillna("").to_numpy(dtype=object)
+
+
+def name_hash(name):
+    """Стабильный между запусками хеш нормализованного названия — ``id`` школы без адреса и ключа."""
+    normalized = " ".join(str(name or "").lower().replace("ё", "е").split())
+    return hashlib.blake2b(normalized.encode(), digest_size=4).hexdigest()
+
+
+def name_key(name):
+    """Название без общих слов, латиницей: «Skillbox Академия» -> «skillbox».
+
+    Название из одних общих слов («Онлайн школа») остаётся целиком.
+    """
+    name = str(name or "").strip().lower()
+    if DOMAIN_NAME.fullmatch(name):
+        return registered_domain(name).split(".")[0]
+    words = tokenize(name)
+    return ("".join(word for word in words if word not in GENERIC_WORDS) or "".join(words)).translate(TRANSLIT)
+
+
+def shingle_hashes(texts, salt=0):
+    """Хеши шинглов по ``SHINGLE`` символов для массива строк — без цикла по строкам.
+
+    Строки раскладываются в матрицу кодов символов, каждое окно из ``SHINGLE``
+    символов упаковывается в одно число. Возвращает ``(hashes, owners)``: хеш
+    шингла и номер строки, которой он принадлежит. Строка короче окна — один
+    шингл, пустая — уникальный, чтобы ни с чем не совпасть.
+    """
+    texts = np.asarray(texts, dtype=str)
+    lengths = np.strings.str_len(texts)
+    width = max(int(lengths.max(initial=0)), SHINGLE)
+    codes = np.zeros((len(texts), width), dtype=np.uint64)
+    if texts.dtype.itemsize:
+        chars = texts.view(np.uint32).reshape(len(texts), -1)
+        codes[:, :chars.shape[1]] = chars
+    windows = codes[:, :width - SHINGLE + 1] << np.uint64(42)
+    for offset in range(1, SHINGLE):
+        windows |= codes[:, offset:width - SHINGLE + 1 + offset] << np.uint64(42 - 21 * offset)
+    valid = np.arange(width - SHINGLE + 1) < np.maximum(lengths - SHINGLE + 1, 1)[:, None]
+    owners, positions = np.nonzero(valid)
+    packed = windows[owners, positions]
+    empty = lengths[owners] == 0
+    packed[empty] = owners[empty].astype(np.uint64) | np.uint64(1 << 63)
+    return pd.util.hash_array(packed ^ np.uint64(salt)), owners
+
+
+def minhash(hashes, owners, size, num_perm=NUM_PERM, seed=1):
+    """Подписи MinHash: матрица ``size x num_perm`` по хешам шинглов и их владельцам.
+
+    ``owners`` отсортированы (как их отдаёт ``shingle_hashes``), у каждой строки
+    есть хотя бы один шингл; минимум по строке — ``np.minimum.reduceat``.
+    Подпись объединения множеств — поэлементный минимум их подписей.
+    """
+    starts = np.searchsorted(owners, np.arange(size))
+    rng = np.random.default_rng(seed)
+    # Хеш-функции вида multiply-shift: (a * x + b) по модулю 2^64, старшие 32 бита
+    a = rng.integers(0, 1 << 63, num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    b = rng.integers(0, 1 << 63, num_perm, dtype=np.uint64)
+    signatures = np.empty((size, num_perm), dtype=np.uint32)
+    for k in range(num_perm):
+        signatures[:, k] = np.minimum.reduceat((a[k] * hashes + b[k]) >> np.uint64(32), starts)
+    return signatures
+
+
+def candidate_pairs(signatures, bands=BANDS, max_bucket=MAX_BUCKET):
+    """Пары записей, совпавших хотя бы в одной полосе подписи: массив ``(m, 2)``, ``i < j``."""
+    n, num_perm = signatures.shape
+    rows = num_perm // bands
+    pairs = [np.empty((0, 2), dtype=np.int64)]
+    for band in range(bands):
+        keys = pd.util.hash_pandas_object(
+            pd.DataFrame(signatures[:, band * rows:(band + 1) * rows]), index=False
+        ).to_numpy()
+        order = np.argsort(keys, kind="stable")
+        bounds = np.flatnonzero(np.diff(keys[order])) + 1
+        starts = np.concatenate([[0], bounds])
+        sizes = np.diff(np.concatenate([starts, [n]]))
+        # Корзины одного размера разворачиваем в пары одним блоком
+        for size in np.unique(sizes[(sizes > 1) & (sizes <= max_bucket)]):
+            members = order[starts[sizes == size][:, None] + np.arange(size)]
+            first, second = np.triu_indices(size, 1)
+            pairs.append(np.stack([members[:, first].ravel(), members[:, second].ravel()], axis=1))
+    pairs = np.sort(np.concatenate(pairs), axis=1)
+    # Одна пара могла совпасть в нескольких полосах: убираем повторы по коду i * n + j
+    codes = np.sort(pairs[:, 0] * n + pairs[:, 1])
+    keep = np.ones(len(codes), dtype=bool)
+    keep[1:] = codes[1:] != codes[:-1]
+    codes = codes[keep]
+    return np.stack([codes // n, codes % n], axis=1)
+
+
+def components(n, pairs):
+    """Связные компоненты графа на ``n`` вершинах: метка — наименьший номер в компоненте."""
+    labels = np.arange(n)
+    if not len(pairs):
+        return labels
+    first, second = pairs[:, 0], pairs[:, 1]
+    while True:
+        low = np.minimum(labels[first], labels[second])
+        merged = labels.copy()
+        np.minimum.at(merged, first, low)
+        np.minimum.at(merged, second, low)
+        merged = merged[merged]
+        if np.array_equal(merged, labels):
+            return labels
+        labels = merged
+
+
+def _stars(codes):
+    # Пара (первая запись группы, запись) для каждой записи: группы одинаковых ``codes`` связны
+    order = np.argsort(codes, kind="stable")
+    group_start = np.concatenate([[0], np.flatnonzero(np.diff(codes[order])) + 1])
+    head = np.repeat(order[group_start], np.diff(np.concatenate([group_start, [len(codes)]])))
+    pairs = np.empty((len(codes), 2), dtype=np.int64)
+    pairs[order] = np.stack([head, order], axis=1)
+    return pairs
+
+
+def cluster(names, urls, known_ids=None, threshold=NAME_THRESHOLD):
+    """Метки кластеров дублей и стабильные ``id`` для каждой записи.
+
+    Дубли — записи с одним регистрируемым доменом, а также пары, найденные LSH
+    по шинглам названия и метки домена, у которых похожи названия (оценка Жаккара
+    не ниже ``threshold``) и одна метка содержит другую («netology» и «netology-group»).
+    Поддомены платформ (GetCourse, Tilda) и составных суффиксов (co.uk) — разные домены.
+
+    ``id`` кластера — самый короткий (затем первый по алфавиту) домен его записей;
+    у кластера без адресов — ключ названия, а без него — хеш названия. Так ``id`` не
+    зависит ни от порядка источников, ни от других школ в выдаче и не повторяется
+    у разных кластеров. ``known_ids`` — уже назначенные ``id`` (например, из каталога):
+    они участвуют в выборе наравне с доменом.
+    """
+    n = len(names)
+    names = pd.Series(names, dtype="string").fillna("")
+    domains = registered_domains(urls)
+    # Запись без адреса, но с доменом вместо названия («skillbox.ru») — тот же домен
+    named = names.str.strip().str.lower().str.fullmatch(DOMAIN_NAME.pattern).to_numpy(dtype=bool)
+    domains = np.where((domains == "") & named, registered_domains(names.where(named, "")), domains)
+    roots = domain_labels(domains)
+    # Названия в больших выдачах повторяются: ключи и подписи считаем по уникальным
+    name_codes, unique_names = pd.factorize(names)
+    keys = np.array([name_key(name) for name in unique_names], dtype=object)[name_codes]
+    key_codes, unique_keys = pd.factorize(keys)
+    name_signatures = minhash(*shingle_hashes(unique_keys), len(unique_keys))[key_codes]
+    root_codes, unique_roots = pd.factorize(roots)
+    # Шинглы домена солим, чтобы «net» в домене и в названии были разными элементами
+    root_signatures = minhash(*shingle_hashes(unique_roots, salt=ROOT_SALT), len(unique_roots))[root_codes]
+    signatures = np.minimum(name_signatures, root_signatures)
+    domain_codes = pd.factorize(domains)[0]
+    has_domain = domains != ""
+
+    pairs = candidate_pairs(signatures)
+    first, second = pairs[:, 0], pairs[:, 1]
+    same_domain = (domain_codes[first] == domain_codes[second]) & has_domain[first]
+    similar = (name_signatures[first] == name_signatures[second]).mean(axis=1) >= threshold
+    check = np.flatnonzero(similar & ~same_domain)
+    left, right = roots[pairs[check, 0]].astype(str), roots[pairs[check, 1]].astype(str)
+    contained = (
+        (np.strings.str_len(left) > 0) & (np.strings.str_len(right) > 0)
+        & ((np.strings.find(left, right) >= 0) | (np.strings.find(right, left) >= 0))
+    )
+    matched = pairs[check[contained]]
+
+    # Одинаковый домен — дубль всегда, даже если LSH пару не нашёл; запись без адреса
+    # присоединяется к школе с тем же названием
+    same_domain = _stars(domain_codes)[has_domain]
+    same_name = _stars(key_codes)
+    same_name = same_name[(keys != "") & ~(has_domain[same_name[:, 0]] & has_domain[same_name[:, 1]])]
+
+    labels = components(n, np.concatenate([matched, same_domain, same_name]))
+
+    # Ранг источника id: домен или готовый id, затем ключ названия, затем хеш названия
+    candidates = np.where(has_domain, domains, keys)
+    rank = np.where(has_domain, 0, np.where(keys != "", 1, 2))
+    if known_ids is not None:
+        known = pd.Series(known_ids, dtype="string").fillna("").to_numpy(dtype=object)
+        candidates = np.where(known != "", known, candidates)
+        rank = np.where(known != "", 0, rank)
+    fallback = np.flatnonzero(rank == 2)
+    candidates[fallback] = [f"school-{name_hash(names.iloc[i])}" for i in fallback]
+    members = pd.DataFrame({"label": labels, "rank": rank, "id": candidates})
+    chosen = (
+        members.assign(length=members["id"].str.len())
+        .sort_values(["label", "rank", "length", "id"])
+        .drop_duplicates("label")
+        .set_index("label")["id"]
+    )
+    # Совпасть могут только готовые id или хеши: повтору добавляем номер кластера
+    repeated = chosen.duplicated()
+    chosen[repeated] = chosen[repeated] + "-" + chosen.index[repeated].astype(str)
+    return labels, members["label"].map(chosen).to_numpy(dtype=object)
+
+
+def resolve_schools(schools):
+    """Сливает дубли в списке школ; у каждой школы в ответе есть ``id`` и ``aliases``.
+
+    Поля берутся у записи с самым крупным числом студентов (при равенстве — с адресом),
+    ``aliases`` — прочие названия школы. Порядок — по первому появлению школы в ``schools``.
+    """
+    if not schools:
+        return []
+    labels, ids = cluster(
+        [school.get("name") for school in schools],
+        [school.get("url") for school in schools],
+        [school.get("id") for school in schools],
+    )
+    students = [int(re.sub(r"\D", "", str(school.get("students", ""))) or 0) for school in schools]
+
+    groups = {}
+    for index, label in enumerate(labels):
+        groups.setdefault(label, []).append(index)
+    resolved = []
+    for label, indexes in groups.items():
+        best = max(indexes, key=lambda index: (students[index], bool(schools[index].get("url"))))
+        school = dict(schools[best])
+        names = [schools[index]["name"] for index in indexes]
+        aliases = [alias for school_aliases in (schools[index].get("aliases") or [] for index in indexes)
+                   for alias in school_aliases]
+        school["id"] = ids[best]
+        school["aliases"] = [name for name in dict.fromkeys(names + aliases) if name != school["name"]]
+        resolved.append(school)
+    return resolved
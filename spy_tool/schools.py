@@ -0,0 +1,82 @@
+"""Таблица найденных школ: типизированные колонки, фильтрация, сортировка и сводка."""
+
+import pandas as pd
+
+COLUMNS = ["id", "name", "aliases", "niche", "price", "students", "rating", "url"]
+
+SORT_COLUMNS = {
+    "Рейтинг": "rating",
+    "Цена": "price",
+    "Студенты": "students",
+    "Название": "name",
+}
+
+
+def _digits(values):
+    # "49,900₽" -> 49900, "50,000+" -> 50000; пустые и нечисловые значения -> <NA>
+    return pd.to_numeric(values.astype("string").str.replace(r"\D", "", regex=True), errors="coerce").astype("Int64")
+
+
+def schools_frame(records):
+    """Собирает таблицу школ один раз при получении выдачи; индекс — ``id`` школы.
+
+    Записи уже сведены ``spy_tool.resolve.resolve_schools``. Цена и число студентов
+    приходят из источников строками вида ``"49,900₽"`` и ``"50,000+"`` и здесь же
+    разбираются в числовые колонки, другие названия школы — в строку через запятую.
+    """
+    frame = pd.DataFrame.from_records(records, columns=COLUMNS)
+    frame["aliases"] = [", ".join(aliases) if isinstance(aliases, list) else "" for aliases in frame["aliases"]]
+    frame["price"] = _digits(frame["price"])
+    frame["students"] = _digits(frame["students"])
+    frame["rating"] = pd.to_numeric(frame["rating"], errors="coerce").astype("float64")
+    frame["name"] = frame["name"].astype("string")
+    frame["niche"] = frame["niche"].astype("string")
+    frame["url"] = frame["url"].astype("string")
+    frame["id"] = frame["id"].astype("string")
+    frame["aliases"] = frame["aliases"].astype("string")
+    return frame.set_index("id", drop=False)
+
+
+def format_rub(value):
+    return "—" if pd.isna(value) else f"{value:,.0f}₽"
+
+
+def format_students(value):
+    return "—" if pd.isna(value) else f"{value:,.0f}+"
+
+
+def summary_metrics(frame):
+    """Сводные показатели по выбранным школам: векторные агрегаты по колонкам."""
+    price = frame["price"]
+    return {
+        "price_mean": price.mean(),
+        "price_min": price.min(),
+        "price_max": price.max(),
+        "rating_mean": frame["rating"].mean(),
+        "students_total": frame["students"].sum(),
+    }
+
+
+def query_schools(frame, text="", sort_by="Рейтинг", descending=True):
+    """Возвращает ``id`` школ, подходящих под фильтр, в порядке сортировки."""
+    view = frame
+    text = text.strip()
+    if text:
+        mask = (
+            frame["name"].str.contains(text, case=False, regex=False)
+            | frame["aliases"].str.contains(text, case=False, regex=False)
+            | frame["niche"].str.contains(text, case=False, regex=False)
+            | frame["url"].str.contains(text, case=False, regex=False)
+        )
+        view = frame[mask.fillna(False)]
+
+    column = SORT_COLUMNS[sort_by]
+    view = view.sort_values(column, ascending=not descending, kind="stable", na_position="last")
+    return view.index
+
+
+def page_of(ids, page, page_size):
+    """Срез ``ids`` для страницы ``page`` (с нуля) и общее число страниц."""
+    pages = max(1, -(-len(ids) // page_size))
+    page = min(max(page, 0), pages - 1)
+    return ids[page * page_size:(page + 1) * page_size], pages
@@ -0,0 +1,16 @@
+"""Общие настройки ядра."""
+
+import os
+from pathlib import Path
+
+# Каталог для кешей и хранилищ; переопределяется переменной окружения
+DATA_DIR = Path(os.environ.get("SPY_TOOL_DATA_DIR", ".spy_tool"))
+
+# Объём синтетических данных: школ в каталоге и множитель частоты отзывов (их меняют бенчмарки)
+CATALOG_SIZE = int(os.environ.get("SPY_TOOL_CATALOG_SIZE", 120_000))
+REVIEW_RATE = float(os.environ.get("SPY_TOOL_REVIEW_RATE", 1.0))
+
+# Панель оператора открывается по ?ops=<токен>, без SPY_TOOL_OPS_TOKEN её нет вовсе;
+# с SPY_TOOL_METRICS_LOG перезапуски пишутся туда строками JSON
+OPS_TOKEN = os.environ.get("SPY_TOOL_OPS_TOKEN") or None
+METRICS_LOG = os.environ.get("SPY_TOOL_METRICS_LOG")
@@ -0,0 +1,131 @@
+"""Общие для всех сессий результаты: одно вычисление на ключ, сколько бы пользователей его ни ждали."""
+
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+MB = 2 ** 20
+
+
+def estimate_size(value):
+    """Примерный размер значения в байтах — длина его pickle."""
+    return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+class _Flight:
+    """Вычисление, которое идёт прямо сейчас; его ждут все, кто пришёл за тем же ключом."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+        self.abandoned = False
+
+
+class SharedResults:
+    """Результаты поиска и анализа, общие для всех сессий процесса.
+
+    ``get_or_compute(key, compute)`` работает как single-flight: пока по ключу идёт
+    вычисление, остальные вызовы ждут его результата, а не запускают своё. Готовые
+    значения хранятся не дольше ``ttl`` секунд, их суммарный размер ограничен
+    ``max_bytes`` — сверх лимита вытесняются давно не запрошенные. Значения отдаются
+    всем сессиям одним объектом, менять их нельзя.
+    """
+
+    def __init__(self, max_bytes=256 * MB, ttl=600, sizeof=estimate_size):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.sizeof = sizeof
+        self._entries = OrderedDict()
+        self._flights = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(["hits", "computed", "joined", "evicted"], 0)
+
+    def get_or_compute(self, key, compute, ttl=None, keep=True):
+        """Значение по ключу: из памяти, из идущего вычисления или посчитанное ``compute()``.
+
+        С ``keep=False`` результат не хранится, склеиваются только одновременные вызовы —
+        когда результат и так хранит кто-то другой (например, ``AnalysisCache``).
+        Ошибка вычисления достаётся всем, кто его ждал, но не запоминается.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] > time.time():
+                    self._entries.move_to_end(key)
+                    self._counts["hits"] += 1
+                    return entry[2]
+                flight = self._flights.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._flights[key] = _Flight()
+                self._counts["computed" if leader else "joined"] += 1
+
+            if leader:
+                return self._lead(key, flight, compute, ttl if keep else 0)
+            flight.done.wait()
+            if flight.abandoned:
+                # Ведущий прервался, не досчитав (например, его сессию перезапустили) — считаем сами
+                continue
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+    def pending(self, key):
+        """Идёт ли сейчас вычисление по ключу."""
+        with self._lock:
+            return key in self._flights
+
+    def invalidate(self, key=None):
+        """Забывает одно значение или, без аргумента, все; идущие вычисления не трогает."""
+        with self._lock:
+            for name in list(self._entries) if key is None else [key]:
+                entry = self._entries.pop(name, None)
+                if entry is not None:
+                    self._bytes -= entry[1]
+
+    def stats(self):
+        """Счётчики попаданий и вычислений и текущая занятость памяти."""
+        with self._lock:
+            return {**self._counts, "entries": len(self._entries), "bytes": self._bytes,
+                    "in_flight": len(self._flights)}
+
+    def _lead(self, key, flight, compute, ttl):
+        try:
+            flight.value = compute()
+            if ttl > 0:
+                size = self.sizeof(flight.value)
+                with self._lock:
+                    self._store(key, flight.value, size, ttl)
+        except Exception as exc:
+            flight.error = exc
+            raise
+        except BaseException:
+            # Не ошибка вычисления, а остановка потока (так Streamlit прерывает сессию): ждущие пробуют сами
+            flight.abandoned = True
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.value
+
+    def _store(self, key, value, size, ttl):
+        if size > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= old[1]
+        self._entries[key] = (time.time() + ttl, size, value)
+        self._bytes += size
+        now = time.time()
+        # Сначала выбрасываем истёкшие, потом — давно не запрошенные
+        for expired in [name for name, entry in self._entries.items() if entry[0] <= now]:
+            self._bytes -= self._entries.pop(expired)[1]
+        while self._bytes > self.max_bytes:
+            _, (_, evicted, _) = self._entries.popitem(last=False)
+            self._bytes -= evicted
+            self._counts["evicted"] += 1
@@ -0,0 +1,80 @@
+"""Общее хранилище результатов на SQLite: его пишут CLI и приложение из разных процессов."""
+
+import json
+import sqlite3
+import threading
+import time
+
+from .settings import DATA_DIR
+
+
+def connect(path):
+    """Соединение, которое терпит одновременную запись из нескольких процессов.
+
+    WAL не блокирует читателей на время записи, а ``busy_timeout`` заставляет
+    писателя подождать чужую транзакцию вместо ошибки ``database is locked``.
+    """
+    if path != ":memory:":
+        path.parent.mkdir(parents=True, exist_ok=True)
+    db = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+    if path != ":memory:":
+        db.execute("PRAGMA journal_mode=WAL")
+    return db
+
+
+class ResultStore:
+    """Готовые результаты по ключу ``(вид, ключ)``, например креативы или выдача по нише."""
+
+    def __init__(self, path=None):
+        self.path = path or DATA_DIR / "results.sqlite"
+        self._lock = threading.Lock()
+        self._db = connect(self.path)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " kind TEXT NOT NULL, key TEXT NOT NULL, stored_at REAL NOT NULL,"
+            " payload TEXT NOT NULL, PRIMARY KEY (kind, key))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS results_stored ON results (kind, stored_at)")
+        self._db.commit()
+
+    def get(self, kind, key, max_age=None):
+        """Возвращает ``(stored_at, payload)`` или ``None``, если записи нет или она старше ``max_age``."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT stored_at, payload FROM results WHERE kind = ? AND key = ?", (kind, key)
+            ).fetchone()
+        if row is None or (max_age is not None and time.time() - row[0] >= max_age):
+            return None
+        return row[0], json.loads(row[1])
+
+    def put(self, kind, key, payload, now=None):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                (kind, key, now or time.time(), json.dumps(payload, ensure_ascii=False)),
+            )
+            self._db.commit()
+
+    def prune(self, kind, keep):
+        """Оставляет только ``keep`` самых свежих записей вида ``kind``."""
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM results WHERE kind = ? AND rowid IN"
+                " (SELECT rowid FROM results WHERE kind = ? ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                (kind, kind, keep),
+            )
+            self._db.commit()
+
+    def delete(self, kind, keys):
+        with self._lock:
+            self._db.executemany("DELETE FROM results WHERE kind = ? AND key = ?", [(kind, key) for key in keys])
+            self._db.commit()
+
+    def keys(self, kind, before=None):
+        """Ключи вида ``kind``; с ``before`` — только записанные раньше этого времени."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT key FROM results WHERE kind = ? AND stored_at < ? ORDER BY key",
+                (kind, float("inf") if before is None else before),
+            ).fetchall()
+        return [key for (key,) in rows]
@@ -0,0 +1,35 @@
+"""Разбор текста для поиска: токены и лёгкий стемминг русских слов."""
+
+import functools
+import re
+
+TOKEN = re.compile(r"[а-яa-z0-9]+")
+
+# Окончания, которые отрезаются у слова; сначала длинные, чтобы «-ами» не стало «-и»
+ENDINGS = sorted(
+    [
+        "иями", "ями", "ами", "ием", "иях", "ого", "его", "ому", "ему", "ыми", "ими", "ая", "яя",
+        "ое", "ее", "ие", "ия", "ий", "ый", "ой", "ей", "ую", "юю", "ию", "ии", "ов", "ев", "ах",
+        "ях", "ам", "ям", "ом", "ем", "ые", "ых", "их", "ым", "им", "ы", "и", "а", "я", "о", "е",
+        "у", "ю", "ь", "й",
+    ],
+    key=len, reverse=True,
+)
+MIN_STEM = 3
+
+
+@functools.lru_cache(maxsize=100_000)
+def stem(word):
+    """Основа слова без падежного окончания: «маркетингу» -> «маркетинг»."""
+    for ending in ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM:
+            return word[:-len(ending)]
+    return word
+
+
+def tokenize(text):
+    return TOKEN.findall(str(text).lower().replace("ё", "е"))
+
+
+def stems(text):
+    return [stem(token) for token in tokenize(text)]
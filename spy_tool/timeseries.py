@@ -0,0 +1,160 @@
+"""Временные ряды активности: колоночное хранилище на диске и прореживание LTTB."""
+
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from .columns import append_columns, committed_rows, locked, read_column
+from .settings import DATA_DIR
+
+ACTIVITY_METRICS = {
+    "ads": "Рекламная активность",
+    "posts": "Новые посты",
+}
+HOUR = 3600
+SERIES_COLUMNS = {"time.i8": np.int64, "values.f8": np.float64}
+
+
+class SeriesStore:
+    """Ряды ``(школа, метрика)`` в виде двух файлов-колонок: время и значения.
+
+    Точки только дописываются в конец, время строго растёт. Чтение идёт через
+    ``np.memmap``: запрос диапазона — это двоичный поиск по колонке времени и
+    срез, в память попадают только нужные страницы файла. Ряды пишут несколько
+    процессов: запись идёт под блокировкой каталога (см. ``spy_tool.columns``).
+    """
+
+    def __init__(self, root=None):
+        self.root = root or DATA_DIR / "timeseries"
+
+    def _directory(self, key, metric):
+        return self.root / key / metric
+
+    def _columns(self, key, metric):
+        directory = self._directory(key, metric)
+        rows = committed_rows(directory, SERIES_COLUMNS)
+        return tuple(read_column(directory, name, dtype, rows) for name, dtype in SERIES_COLUMNS.items())
+
+    def last_time(self, key, metric):
+        times, _ = self._columns(key, metric)
+        return int(times[-1]) if len(times) else None
+
+    def append(self, key, metric, times, values):
+        """Дописывает точки новее последней сохранённой; остальные пропускает."""
+        times = np.asarray(times, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        directory = self._directory(key, metric)
+        with locked(directory):
+            rows = committed_rows(directory, SERIES_COLUMNS)
+            if rows:
+                last = read_column(directory, "time.i8", np.int64, rows)[-1]
+                fresh = times > last
+                times, values = times[fresh], values[fresh]
+            if not len(times):
+                return 0
+            append_columns(directory, {"time.i8": times, "values.f8": values}, rows)
+        return len(times)
+
+    def query(self, key, metric, start=None, end=None):
+        """Точки в полуинтервале ``[start, end)`` (unix-секунды)."""
+        times, values = self._columns(key, metric)
+        lo = 0 if start is None else np.searchsorted(times, start, side="left")
+        hi = len(times) if end is None else np.searchsorted(times, end, side="left")
+        return np.array(times[lo:hi]), np.array(values[lo:hi])
+
+    def span(self, key, metric):
+        times, _ = self._columns(key, metric)
+        return (int(times[0]), int(times[-1])) if len(times) else None
+
+
+def lttb(x, y, threshold):
+    """Largest-Triangle-Three-Buckets: оставляет ``threshold`` точек, сохраняя форму ряда."""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return x, y
+
+    xf = x.astype(np.float64)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+
+    selected = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        # Среднее следующего окна — третья вершина треугольника
+        next_lo, next_hi = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = xf[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+
+        areas = np.abs(
+            (xf[selected] - avg_x) * (y[lo:hi] - y[selected])
+            - (xf[selected] - xf[lo:hi]) * (avg_y - y[selected])
+        )
+        selected = lo + int(np.argmax(areas))
+        keep[i + 1] = selected
+
+    return x[keep], y[keep]
+
+
+def activity_frame(store, key, start=None, end=None, max_points=800):
+    """Ряды активности за период, прореженные до ``max_points`` точек на метрику.
+
+    Возвращает длинную таблицу (Дата, Метрика, Значение) для ``px.line``.
+    """
+    frames = []
+    for metric, label in ACTIVITY_METRICS.items():
+        times, values = store.query(key, metric, start, end)
+        times, values = lttb(times, values, max_points)
+        frames.append(pd.DataFrame({
+            "Дата": pd.to_datetime(times, unit="s"),
+            "Метрика": label,
+            "Значение": values,
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def stub_activity(key, start, end):
+    """Синтетическая почасовая активность школы на интервале ``[start, end)``.
+
+    Значения зависят только от времени точки, поэтому догрузка новых часов
+    продолжает уже сохранённый ряд без разрывов.
+    """
+    seed = zlib.crc32(key.encode()) % 1000
+    times = np.arange(start - start % HOUR + (HOUR if start % HOUR else 0), end, HOUR, dtype=np.int64)
+    hours = times // HOUR
+    day = hours / 24.0
+    hour_of_day = hours % 24
+    mixed = (hours.astype(np.uint64) * np.uint64(2654435761) + np.uint64(seed)) % np.uint64(1000)
+
+    daily = 20 + 10 * np.sin(2 * np.pi * (day + seed) / 7) + 5 * np.sin(2 * np.pi * day / 365)
+    working = np.where((hour_of_day >= 8) & (hour_of_day <= 22), 1.0, 0.3)
+    ads = daily * working + mixed.astype(np.float64) / 100
+    posts = ((mixed % np.uint64(24)) < 3).astype(np.float64) * working
+    return times, {"ads": ads, "posts": posts}
+
+
+class ActivityCollector:
+    """Сборщик для ``analyze_schools``: дописывает в хранилище новые часы активности.
+
+    Сами ряды в кеш анализа не попадают — там только сведения о диапазоне,
+    а график читает нужный период прямо из ``SeriesStore``.
+    """
+
+    def __init__(self, store=None, history_days=730, generate=stub_activity):
+        self.store = store or SeriesStore()
+        self.history_days = history_days
+        self.generate = generate
+
+    def __call__(self, school):
+        key = school["id"]
+        now = int(time.time())
+        last = self.store.last_time(key, "ads")
+        start = now - self.history_days * 24 * HOUR if last is None else last + 1
+        times, series = self.generate(key, start, now)
+        for metric, values in series.items():
+            self.store.append(key, metric, times, values)
+
+        first, last = self.store.span(key, "ads")
+        return {"start": first, "end": last}
@@ -0,0 +1,145 @@
+"""Темы отзывов: накопительные счётчики похвал и жалоб с водяными знаками."""
+
+import json
+import threading
+
+import pandas as pd
+
+from .settings import DATA_DIR
+from .store import connect
+
+# Тема -> регулярное выражение по основам слов
+PRAISE_TOPICS = {
+    "Качественная подача материала": r"качеств|понятн|подача",
+    "Много практических заданий": r"практи",
+    "Отзывчивые кураторы": r"куратор|отзывчив|преподават",
+    "Актуальная информация": r"актуальн|свеж",
+}
+COMPLAINT_TOPICS = {
+    "Высокая цена": r"дорог|цен[аыу]",
+    "Слабая поддержка трудоустройства": r"трудоустр",
+    "Мало обратной связи": r"обратн[а-яё]* связ",
+    "Устаревшие кейсы": r"устар|лет назад",
+    "Проблемы с возвратом денег": r"вернуть|возврат",
+}
+TOPICS = {**PRAISE_TOPICS, **COMPLAINT_TOPICS}
+
+# Что предложить, если у конкурента часто жалуются на тему
+OPPORTUNITIES = {
+    "Высокая цена": "Сделать цену на 20% ниже",
+    "Слабая поддержка трудоустройства": "Акцент на помощь с трудоустройством",
+    "Мало обратной связи": "Персональная обратная связь",
+    "Устаревшие кейсы": "Свежие кейсы этого года",
+    "Проблемы с возвратом денег": "Прозрачные условия возврата",
+}
+
+
+def empty_state():
+    return {
+        "watermarks": {},
+        "reviews": {"total": 0, "by_source": {}, "by_month": {}},
+        "topics": {topic: {"total": 0, "by_source": {}, "by_month": {}} for topic in TOPICS},
+        # Счётчики и примеры ``spy_tool.reviews.ReviewAggregator`` по тем же отзывам
+        "summary": {},
+    }
+
+
+def _add_counts(bucket, values):
+    for key, count in values.value_counts().items():
+        bucket[key] = bucket.get(key, 0) + int(count)
+
+
+def add_chunk(state, chunk):
+    """Добавляет к счётчикам порцию отзывов и сдвигает водяной знак её источника."""
+    if chunk.empty:
+        return
+    texts = chunk["text"].str.lower()
+    months = chunk["date"].dt.to_period("M").astype(str)
+
+    reviews = state["reviews"]
+    reviews["total"] += len(chunk)
+    _add_counts(reviews["by_source"], chunk["source"])
+    _add_counts(reviews["by_month"], months)
+
+    for topic, pattern in TOPICS.items():
+        mask = texts.str.contains(pattern, regex=True).to_numpy()
+        if not mask.any():
+            continue
+        counts = state["topics"].setdefault(topic, {"total": 0, "by_source": {}, "by_month": {}})
+        counts["total"] += int(mask.sum())
+        _add_counts(counts["by_source"], chunk["source"][mask])
+        _add_counts(counts["by_month"], months[mask])
+
+    for source, last in chunk.groupby("source")["date"].max().items():
+        current = state["watermarks"].get(source)
+        if current is None or last > pd.Timestamp(current):
+            state["watermarks"][source] = last.isoformat()
+
+
+def update_topics(state, sources, chunk_size=5000, on_chunk=None):
+    """Дочитывает из ``sources`` только отзывы новее водяных знаков.
+
+    ``on_chunk(chunk)`` вызывается для каждой новой порции — так по тем же отзывам
+    копится и другая сводка.
+    """
+    for source in sources:
+        since = state["watermarks"].get(source.source)
+        since = pd.Timestamp(since) if since else None
+        for chunk in source.iter_chunks(chunk_size, since=since):
+            if on_chunk is not None:
+                on_chunk(chunk)
+            add_chunk(state, chunk)
+    return state
+
+
+def topic_shares(state, months=None):
+    """Доли отзывов по темам в процентах; ``months`` — последние N месяцев или всё время."""
+    def share(counts, total):
+        return round(100 * counts / total) if total else 0
+
+    if months is None:
+        total = state["reviews"]["total"]
+        counts = {topic: data["total"] for topic, data in state["topics"].items()}
+    else:
+        window = sorted(state["reviews"]["by_month"])[-months:]
+        total = sum(state["reviews"]["by_month"][month] for month in window)
+        counts = {
+            topic: sum(data["by_month"].get(month, 0) for month in window)
+            for topic, data in state["topics"].items()
+        }
+
+    def ranked(topics):
+        shares = [(topic, share(counts.get(topic, 0), total)) for topic in topics]
+        return sorted((item for item in shares if item[1] > 0), key=lambda item: -item[1])
+
+    return {
+        "praise": ranked(PRAISE_TOPICS),
+        "complaints": ranked(COMPLAINT_TOPICS),
+        "reviews": total,
+    }
+
+
+class TopicStore:
+    """Состояние отзывов по каждой школе в SQLite, чтобы обновление было инкрементальным."""
+
+    def __init__(self, path=None):
+        self.path = path or DATA_DIR / "topics.sqlite"
+        self._lock = threading.Lock()
+        self._db = connect(self.path)
+        self._db.execute("CREATE TABLE IF NOT EXISTS topic_state (url TEXT PRIMARY KEY, state TEXT NOT NULL)")
+        self._db.commit()
+
+    def load(self, url):
+        with self._lock:
+            row = self._db.execute("SELECT state FROM topic_state WHERE url = ?", (url,)).fetchone()
+        state = json.loads(row[0]) if row else empty_state()
+        # Состояние, сохранённое до сводки отзывов, не знает старых отзывов: читаем историю заново
+        return state if "summary" in state else empty_state()
+
+    def save(self, url, state):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO topic_state VALUES (?, ?)",
+                (url, json.dumps(state, ensure_ascii=False)),
+            )
+            self._db.commit()
@@ -1,9 +1,23 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime, timedelta
+from collections import Counter
+from datetime import datetime
 import time
+import uuid
+
+# Здесь только лёгкие модули. pandas, numpy и plotly импортируются на страницах,
+# которым они нужны, чтобы форма поиска на холодном старте открывалась без них
+from spy_tool.cache import AnalysisCache, format_age
+from spy_tool.creatives import (
+    CREATIVE_TYPES, CreativeCache, CreativePrompt, StubBackend, creative_recommendations, generate_batch,
+    parse_creatives
+)
+from spy_tool.discovery import (
+    DEFAULT_PRICE_RANGE, NICHES, PRICE_LIMITS, REGIONS, SCHOOL_SIZES, SearchQuery, default_sources, discover, load_snapshot, save_snapshot
+)
+from spy_tool.metrics import METRICS, log_to
+from spy_tool.settings import METRICS_LOG, OPS_TOKEN
+from spy_tool.shared import SharedResults
+from spy_tool.store import ResultStore
 
 # Настройка страницы
 st.set_page_config(
@@ -12,13 +26,159 @@ st.set_page_config(
     layout="wide"
 )
 
+SCHOOLS_PAGE_SIZE = 25
+# Сколько найденных школ показывать, пока идёт поиск
+FOUND_PREVIEW = 10
+ACTIVITY_PERIODS = {"7 дней": 7, "30 дней": 30, "90 дней": 90, "Год": 365, "Всё время": None}
+# Отступ вложенных этапов в панели метрик (обычные пробелы markdown съедает)
+EM_SPACE = "\u2003"
+
+
+@st.cache_resource
+def get_metrics():
+    # Один реестр на процесс; с SPY_TOOL_METRICS_LOG каждый перезапуск пишется в файл строкой JSON
+    if METRICS_LOG:
+        log_to(METRICS_LOG)
+    return METRICS
+
+
+@st.cache_resource
+def get_analysis_cache():
+    # Один кеш на процесс: общий для всех сессий и переживает перезапуск через SQLite
+    return AnalysisCache()
+
+
+@st.cache_resource
+def get_shared_results():
+    # Выдачи и идущие сборы, общие для всех сессий: тридцать человек с одной школой — один сбор
+    shared = SharedResults()
+    get_metrics().register("shared_results", shared.stats)
+    return shared
+
+
+@st.cache_resource
+def get_topic_store():
+    from spy_tool.topics import TopicStore
+    return TopicStore()
+
+
+@st.cache_resource
+def get_series_store():
+    from spy_tool.timeseries import SeriesStore
+    return SeriesStore()
+
+
+@st.cache_resource
+def get_post_store():
+    from spy_tool.social import PostStore
+    return PostStore()
+
+
+@st.cache_resource
+def get_figure_cache():
+    from spy_tool.charts import FigureCache
+    cache = FigureCache()
+    get_metrics().register("figure_cache", lambda: {"hits": cache.hits, "misses": cache.misses})
+    return cache
+
+
+@st.cache_resource
+def get_creative_backend():
+    return StubBackend()
+
+
+@st.cache_resource
+def get_result_store():
+    # Сюда же складывает результаты ночной прогон: python -m spy_tool precompute
+    return ResultStore()
+
+
+@st.cache_resource
+def get_request_log():
+    from spy_tool.refresh import RequestLog
+    return RequestLog()
+
+
+@st.cache_resource
+def get_creative_cache():
+    cache = CreativeCache(store=get_result_store())
+    get_metrics().register("creative_cache", lambda: {"hits": cache.hits, "misses": cache.misses})
+    return cache
+
+
+def get_selected_frame():
+    frame = st.session_state.schools_frame
+    return frame.loc[list(st.session_state.selected_ids)].sort_values('name')
+
+
+def format_span(span):
+    labels = ", ".join(f"{key}={value}" for key, value in span['labels'].items())
+    return f"`{span['name']}`{f' ({labels})' if labels else ''}"
+
+
+def render_ops_panel(trace, interrupted=None):
+    """Панель оператора в сайдбаре: этапы перезапуска, агрегаты процесса, выгрузка и профиль."""
+    import json
+    
+    with st.sidebar:
+        st.markdown("### 🛠 Метрики")
+        st.toggle("Профилировать перезапуски", key="ops_profile", help="cProfile на каждый перезапуск этой сессии")
+        
+        for title, shown in [("Этот перезапуск", trace), ("Прерванный перед ним", interrupted)]:
+            if shown is None:
+                continue
+            st.markdown(f"**{title}** ({shown.context['page']}): {shown.seconds * 1000:.0f} мс")
+            spans = sorted(shown.spans, key=lambda span: span['offset'])
+            st.markdown("  \n".join(
+                f"{EM_SPACE * span['depth']}{format_span(span)} — {span['seconds'] * 1000:.1f} мс" for span in spans
+            ) or "—")
+            if shown.profile_text:
+                with st.expander("Профиль"):
+                    st.code(shown.profile_text)
+        
+        snapshot = metrics.snapshot()
+        with st.expander("Процесс целиком"):
+            st.markdown("  \n".join(
+                f"{format_span(span)}: {span['count']}× • {span['sum']:.2f} с • макс {span['max'] * 1000:.0f} мс"
+                for span in sorted(snapshot['spans'], key=lambda span: -span['sum'])
+            ) or "—")
+            st.markdown("  \n".join(
+                [f"{format_span(counter)}: {counter['value']}" for counter in snapshot['counters']]
+                + [f"`{source}`: {stats}" for source, stats in snapshot['sources'].items()]
+            ) or "—")
+        
+        st.download_button("⬇️ JSON", json.dumps({"process": snapshot, "rerun": trace.record()}, ensure_ascii=False),
+                           file_name="spy_tool_metrics.json", mime="application/json", on_click="ignore")
+        st.download_button("⬇️ Prometheus", metrics.prometheus(), file_name="spy_tool_metrics.prom",
+                           mime="text/plain", on_click="ignore")
+
+
 # Инициализация состояния
 if 'search_completed' not in st.session_state:
     st.session_state.search_completed = False
 if 'analysis_completed' not in st.session_state:
     st.session_state.analysis_completed = False
-if 'selected_schools' not in st.session_state:
-    st.session_state.selected_schools = []
+if 'selected_ids' not in st.session_state:
+    st.session_state.selected_ids = set()
+if 'schools_frame' not in st.session_state:
+    st.session_state.schools_frame = None
+if 'analysis_results' not in st.session_state:
+    st.session_state.analysis_results = {}
+if 'session_tag' not in st.session_state:
+    st.session_state.session_tag = uuid.uuid4().hex[:8]
+
+# Телеметрия перезапуска: отрезки этапов и, для оператора (?ops=...), панель в сайдбаре
+metrics = get_metrics()
+ops_enabled = OPS_TOKEN is not None and st.query_params.get("ops") == OPS_TOKEN
+# Перезапуск, оборванный st.rerun(), до конца скрипта не дошёл — закрываем его здесь
+interrupted_trace = st.session_state.pop('rerun_trace', None)
+if interrupted_trace is not None:
+    interrupted_trace.finish(interrupted=True)
+page = "results" if st.session_state.analysis_completed else "selection" if st.session_state.search_completed else "search"
+st.session_state.rerun_trace = metrics.begin(
+    profile=ops_enabled and st.session_state.get('ops_profile', False),
+    page=page, session=st.session_state.session_tag
+)
 
 # Кастомный CSS
 st.markdown("""
@@ -120,21 +280,7 @@ if not st.session_state.search_completed:
     with col1:
         st.subheader("🎯 Выбери нишу")
         
-        niche = st.selectbox(
-            "Основная ниша",
-            [
-                "Digital-маркетинг & SMM",
-                "Программирование & IT", 
-                "Дизайн & Графика",
-                "Бизнес & Предпринимательство",
-                "Психология & Личностный рост",
-                "Языки & Лингвистика",
-                "Фитнес & Здоровье",
-                "Финансы & Инвестиции",
-                "Кулинария & Хобби",
-                "Красота & Стиль"
-            ]
-        )
+        niche = st.selectbox("Основная ниша", NICHES)
         
         keywords = st.text_input(
             "🔑 Дополнительные ключевые слова",
@@ -146,442 +292,652 @@ if not st.session_state.search_completed:
         
         price_range = st.slider(
             "💰 Ценовой диапазон (₽)",
-            5000, 200000, (20000, 80000), 5000
+            *PRICE_LIMITS, DEFAULT_PRICE_RANGE, 5000
         )
         
-        region = st.selectbox(
-            "📍 Регион",
-            ["Россия", "СНГ", "Весь мир"]
-        )
+        region = st.selectbox("📍 Регион", REGIONS)
         
-        school_size = st.selectbox(
-            "📊 Размер школы",
-            ["Любой", "Стартап (до 1000 студентов)", "Средняя (1000-10000)", "Крупная (10000+)"]
-        )
+        school_size = st.selectbox("📊 Размер школы", SCHOOL_SIZES)
     
     st.markdown("---")
     
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
-        if st.button("🔍 Найти конкурентов", type="primary", use_container_width=True):
-            with st.spinner("Ищем онлайн школы в нише..."):
-                progress_bar = st.progress(0)
-                for i in range(100):
-                    time.sleep(0.02)
-                    progress_bar.progress(i + 1)
+        if st.button("🔍 Найти конкурентов", type="primary", width="stretch"):
+            from spy_tool.resolve import resolve_schools
+            
+            query = SearchQuery(niche, keywords, region, school_size, price_range)
+            # По спросу фоновое обновление выбирает, чьи снимки выдачи держать тёплыми
+            get_request_log().record_query(query)
+            shared = get_shared_results()
+            if shared.pending(("search", query.key)):
+                st.info("⏳ Такой же поиск уже выполняется в другой сессии — ждём его результат")
+            
+            def find_schools():
+                # Снимок выдачи по запросу держит тёплым фоновое обновление; живой поиск — только без снимка
+                with metrics.span("snapshot"):
+                    snapshot = load_snapshot(get_result_store(), query)
+                if snapshot:
+                    # Снимки без id сняты до сведения дублей; для сведённых это быстрый повтор
+                    with metrics.span("resolve"):
+                        return snapshot[0], resolve_schools(snapshot[1])
                 
-                st.session_state.search_completed = True
-                st.rerun()
+                progress_bar = st.progress(0, text="Ищем онлайн школы в нише...")
+                found_box = st.empty()
+                found_schools = []
+                
+                # Школы показываем сразу, как только ответил очередной источник
+                with metrics.span("discovery"):
+                    for update in discover(query, default_sources()):
+                        found_schools.extend(update.schools)
+                        status = f"{update.source}: ошибка" if update.error else f"{update.source}: +{len(update.schools)}"
+                        progress_bar.progress(update.done / update.total, text=f"Опрошено источников {update.done}/{update.total} • {status}")
+                    
+                        with found_box.container():
+                            for school in found_schools[:FOUND_PREVIEW]:
+                                st.markdown(f"✅ **{school['name']}** • {school['niche']} • {school['price']}")
+                            if len(found_schools) > FOUND_PREVIEW:
+                                st.markdown(f"… и ещё {len(found_schools) - FOUND_PREVIEW}")
+                
+                # Одна школа из разных источников — одна запись со стабильным id
+                with metrics.span("resolve"):
+                    found_schools = resolve_schools(found_schools)
+                save_snapshot(get_result_store(), query, found_schools)
+                return None, found_schools
+            
+            # Одинаковые запросы из разных сессий ждут один поиск; выдача живёт в памяти процесса
+            with metrics.span("search"):
+                st.session_state.search_snapshot_at, found_schools = shared.get_or_compute(("search", query.key), find_schools)
+            
+            # Строки источников разбираем в типизированную таблицу один раз, а не на каждом перезапуске
+            from spy_tool.schools import schools_frame
+            with metrics.span("schools_frame"):
+                st.session_state.schools_frame = schools_frame(found_schools)
+            st.session_state.search_completed = True
+            st.rerun()
 
 # Если поиск завершен, но анализ не начат - показываем результаты поиска
 elif st.session_state.search_completed and not st.session_state.analysis_completed:
     
-    st.markdown("### 🎉 Найдено онлайн школ в вашей нише: **23**")
+    from spy_tool.analysis import analyze_schools, default_collectors
+    from spy_tool.schools import SORT_COLUMNS, page_of, query_schools
+    
+    frame = st.session_state.schools_frame
+    selected_ids = st.session_state.selected_ids
     
-    # Мок-данные школ
-    schools_data = [
-        {"name": "Skillbox", "niche": "Дизайн", "price": "49,900₽", "students": "50,000+", "rating": "4.2", "url": "skillbox.ru"},
-        {"name": "GeekBrains", "niche": "Программирование", "price": "89,900₽", "students": "100,000+", "rating": "4.1", "url": "geekbrains.ru"},
-        {"name": "Нетология", "niche": "Маркетинг", "price": "39,900₽", "students": "200,000+", "rating": "4.4", "url": "netology.ru"},
-        {"name": "TexTerra", "niche": "Контент-маркетинг", "price": "29,900₽", "students": "5,000+", "rating": "4.7", "url": "texterra.ru"},
-        {"name": "Convertmonster", "niche": "Таргетинг", "price": "59,900₽", "students": "15,000+", "rating": "4.5", "url": "convertmonster.ru"},
-        {"name": "WebCanape", "niche": "SMM", "price": "24,900₽", "students": "8,000+", "rating": "4.3", "url": "webcanape.ru"},
-        {"name": "ProductStar", "niche": "Продуктовый менеджмент", "price": "79,900₽", "students": "25,000+", "rating": "4.6", "url": "productstar.ru"},
-        {"name": "Eduson Academy", "niche": "Бизнес", "price": "45,900₽", "students": "12,000+", "rating": "4.0", "url": "eduson.tv"}
-    ]
+    st.markdown(f"### 🎉 Найдено онлайн школ в вашей нише: **{len(frame)}**")
+    if st.session_state.get('search_snapshot_at'):
+        st.caption(f"🕒 Выдача из снимка, обновлён {format_age(time.time() - st.session_state.search_snapshot_at)}")
     
     st.markdown("**📋 Выберите школы для анализа** (выберите 3-5 школ для получения максимальных инсайтов):")
     
-    # Создаем чекбоксы для выбора школ
-    for i, school in enumerate(schools_data):
-        checkbox_key = f"school_{i}"
-        
-        selected = st.checkbox(
-            f"**{school['name']}** • {school['niche']} • {school['price']} • {school['students']} студентов • ⭐ {school['rating']}",
-            key=checkbox_key
-        )
-        
-        if selected and school not in st.session_state.selected_schools:
-            st.session_state.selected_schools.append(school)
-        elif not selected and school in st.session_state.selected_schools:
-            st.session_state.selected_schools.remove(school)
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        filter_text = st.text_input("🔎 Фильтр", placeholder="Название, ниша или сайт")
+    with col2:
+        sort_by = st.selectbox("↕️ Сортировка", list(SORT_COLUMNS))
+    with col3:
+        descending = st.toggle("По убыванию", value=True)
+    
+    # Фильтр и сортировку пересчитываем только когда они меняются
+    view_key = (filter_text, sort_by, descending)
+    if st.session_state.get('schools_view_key') != view_key:
+        with metrics.span("schools_query"):
+            st.session_state.schools_view = query_schools(frame, filter_text, sort_by, descending)
+        st.session_state.schools_view_key = view_key
+        st.session_state.schools_view_version = st.session_state.get('schools_view_version', 0) + 1
+        st.session_state.schools_page = 1
+    
+    view = st.session_state.schools_view
+    page = st.session_state.get('schools_page', 1)
+    page_ids, pages = page_of(view, page - 1, SCHOOLS_PAGE_SIZE)
+    
+    # На странице только её строки: стоимость перезапуска не зависит от размера выдачи
+    page_table = frame.loc[page_ids, ['name', 'niche', 'price', 'students', 'rating', 'url']]
+    page_table.insert(0, 'selected', [school_id in selected_ids for school_id in page_ids])
+    
+    edited = st.data_editor(
+        page_table,
+        key=f"schools_table_{st.session_state.schools_view_version}_{page}",
+        hide_index=True,
+        width="stretch",
+        disabled=['name', 'niche', 'price', 'students', 'rating', 'url'],
+        column_config={
+            'selected': st.column_config.CheckboxColumn("Выбрать"),
+            'name': "Школа",
+            'niche': "Ниша",
+            'price': st.column_config.NumberColumn("Цена", format="%d ₽"),
+            'students': st.column_config.NumberColumn("Студентов", format="%d+"),
+            'rating': st.column_config.NumberColumn("Рейтинг", format="⭐ %.1f"),
+            'url': "Сайт",
+        }
+    )
+    
+    for school_id, checked in zip(page_ids, edited['selected']):
+        if checked:
+            selected_ids.add(school_id)
+        else:
+            selected_ids.discard(school_id)
+    
+    if pages > 1:
+        col1, col2 = st.columns([1, 3])
+        with col1:
+            st.number_input(f"Страница (из {pages})", min_value=1, max_value=pages, key="schools_page")
+        with col2:
+            st.caption(f"Показано {len(page_ids)} из {len(view)} школ")
     
     st.markdown("---")
     
-    selected_count = len(st.session_state.selected_schools)
+    selected_schools = get_selected_frame().to_dict('records')
+    selected_count = len(selected_schools)
     
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
         if selected_count > 0:
-            if st.button(f"🚀 Анализировать выбранные школы ({selected_count})", type="primary", use_container_width=True):
-                with st.spinner(f"Анализируем {selected_count} школ... Это займет 2-3 минуты"):
-                    progress_bar = st.progress(0)
-                    for i in range(100):
-                        time.sleep(0.03)
-                        progress_bar.progress(i + 1)
-                    
-                    st.session_state.analysis_completed = True
-                    st.rerun()
+            if st.button(f"🚀 Анализировать выбранные школы ({selected_count})", type="primary", width="stretch"):
+                collectors = default_collectors(get_topic_store(), get_series_store(), get_post_store())
+                total_jobs = selected_count * len(collectors)
+                progress_bar = st.progress(0, text=f"Анализируем {selected_count} школ...")
+                school_status = {school['id']: st.empty() for school in selected_schools}
+                names = {school['id']: school['name'] for school in selected_schools}
+                finished_by_school = dict.fromkeys(names, 0)
+                
+                def show_progress(school_id, finished, total):
+                    finished_by_school[school_id] = finished
+                    progress_bar.progress(sum(finished_by_school.values()) / total_jobs, text=f"Анализируем {selected_count} школ...")
+                    school_status[school_id].markdown(f"{'✅' if finished == total else '⏳'} **{names[school_id]}**: {finished}/{total} источников")
+                
+                get_request_log().record(selected_schools)
+                # Берём последний снимок, даже устаревший: его освежает фоновое обновление,
+                # а живой сбор нужен только источникам без снимка
+                with metrics.span("analysis"):
+                    st.session_state.analysis_results = analyze_schools(
+                        selected_schools, collectors,
+                        on_progress=show_progress, cache=get_analysis_cache(), serve_stale=True,
+                        shared=get_shared_results()
+                    )
+                st.session_state.analysis_completed = True
+                st.rerun()
         else:
             st.warning("⚠️ Выберите хотя бы одну школу для анализа")
 
 # Если анализ завершен - показываем результаты
 else:
     
+    import pandas as pd
+    from spy_tool.analysis import analysis_version, analyze_schools, default_collectors
+    from spy_tool.compare import ACTIVITY_WINDOW_DAYS, comparison_frame, comparison_table
+    from spy_tool.schools import format_rub, format_students, summary_metrics
+    from spy_tool.social import WEEKDAYS
+    from spy_tool.timeseries import activity_frame
+    from spy_tool.topics import OPPORTUNITIES
+    
+    with metrics.span("summary"):
+        selected_frame = get_selected_frame()
+        selected_schools = selected_frame.to_dict('records')
+        summary = summary_metrics(selected_frame)
+    
     st.markdown("## 🎯 Анализ конкурентов завершен!")
-    st.markdown(f"**Проанализировано школ:** {len(st.session_state.selected_schools)}")
+    st.markdown(f"**Проанализировано школ:** {len(selected_schools)}")
     
     # Общая статистика
+    rating_mean = "—" if pd.isna(summary['rating_mean']) else f"{summary['rating_mean']:.1f}"
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
         st.markdown('<p class="metric-label">Средняя цена</p>', unsafe_allow_html=True)
-        st.markdown('<p class="metric-big">52,400₽</p>', unsafe_allow_html=True)
+        st.markdown(f'<p class="metric-big">{format_rub(summary["price_mean"])}</p>', unsafe_allow_html=True)
     
     with col2:
         st.markdown('<p class="metric-label">Диапазон цен</p>', unsafe_allow_html=True)
-        st.markdown('<p class="metric-big">24,900₽ - 89,900₽</p>', unsafe_allow_html=True)
+        st.markdown(f'<p class="metric-big">{format_rub(summary["price_min"])} - {format_rub(summary["price_max"])}</p>', unsafe_allow_html=True)
     
     with col3:
         st.markdown('<p class="metric-label">Средний рейтинг</p>', unsafe_allow_html=True)
-        st.markdown('<p class="metric-big">⭐ 4.3</p>', unsafe_allow_html=True)
+        st.markdown(f'<p class="metric-big">⭐ {rating_mean}</p>', unsafe_allow_html=True)
     
     with col4:
         st.markdown('<p class="metric-label">Общий охват</p>', unsafe_allow_html=True)
-        st.markdown('<p class="metric-big">450,000+ студентов</p>', unsafe_allow_html=True)
+        st.markdown(f'<p class="metric-big">{format_students(summary["students_total"])} студентов</p>', unsafe_allow_html=True)
+    
+    st.markdown("---")
+    
+    # Все выбранные школы бок о бок: одна таблица вместо переключения школ по одной
+    st.subheader("📊 Сравнение конкурентов")
+    with metrics.span("comparison"):
+        comparison = comparison_frame(
+            selected_frame,
+            {school_id: analysis.results for school_id, analysis in st.session_state.analysis_results.items()},
+            get_series_store()
+        )
+        comparison_styled = comparison_table(comparison)
+    st.dataframe(comparison_styled, hide_index=True, width="stretch")
+    st.caption("Место — по среднему рангу метрик. Зелёный — сильнее остальных, красный — слабее (дешевле — значит сильнее). "
+               f"Реклама — средняя почасовая активность за {ACTIVITY_WINDOW_DAYS} дней.")
     
     st.markdown("---")
     
     # Выбираем конкурента для детального анализа
     st.subheader("🔍 Детальный анализ конкурента")
     
+    # Школы выбираем по id: названия в выдаче повторяются, у одноимённых показываем сайт
+    schools_by_id = {school['id']: school for school in selected_schools}
+    name_counts = Counter(school['name'] for school in selected_schools)
+    
+    def competitor_label(school_id):
+        school = schools_by_id[school_id]
+        return school['name'] if name_counts[school['name']] == 1 else f"{school['name']} ({school['url']})"
+    
     selected_competitor = st.selectbox(
         "Выберите школу для детального анализа:",
-        [school['name'] for school in st.session_state.selected_schools]
+        list(schools_by_id),
+        format_func=competitor_label
     )
     
-    # Поиск выбранной школы
-    competitor_data = next((school for school in st.session_state.selected_schools if school['name'] == selected_competitor), None)
+    competitor_data = schools_by_id.get(selected_competitor)
     
-    if competitor_data:
+    def render_bullets(title, items):
+        st.markdown("  \n".join([f"**{title}**"] + [f"• {item}" for item in items]))
+    
+    def render_creative_cards(creatives):
+        for creative in creatives:
+            st.markdown(f"""
+            <div style="background: #f0f9ff; border: 2px solid #0ea5e9; padding: 1.5rem; border-radius: 12px; margin: 1rem 0;">
+                <h4>{creative['title']}</h4>
+                <p><strong>Заголовок:</strong> {creative['headline']}</p>
+                <p><strong>Описание:</strong> {creative['description']}</p>
+                <p><em>{creative['insight']}</em></p>
+            </div>
+            """, unsafe_allow_html=True)
+    
+    # Каждая вкладка — отдельный фрагмент: взаимодействие внутри неё
+    # перезапускает только этот фрагмент, а не всю страницу
+    @st.fragment
+    def render_overview_tab(competitor_data, results):
+        st.markdown(f"### 📊 Анализ школы: **{competitor_data['name']}**")
         
-        # Вкладки анализа
-        tab1, tab2, tab3, tab4 = st.tabs(["📊 Общая информация", "⭐ Отзывы и репутация", "📱 Соцсети", "🎨 Генератор креативов"])
+        col1, col2 = st.columns(2)
         
-        with tab1:
-            st.markdown(f"### 📊 Анализ школы: **{competitor_data['name']}**")
-            
-            col1, col2 = st.columns(2)
+        traffic = results.get('traffic')
+        pricing = results.get('pricing')
+        
+        with col1:
+            st.markdown(f"""
+            **🏢 Основная информация:**
+            - Сайт: {competitor_data['url']}
+            - Другие названия: {competitor_data['aliases'] or '—'}
+            - Ниша: {competitor_data['niche']}
+            - Цена курсов: {format_rub(competitor_data['price'])}
+            - Количество студентов: {format_students(competitor_data['students'])}
+            - Рейтинг: ⭐ {competitor_data['rating']}/5
+            """)
             
-            with col1:
+            if traffic:
+                traffic_sources = ", ".join(f"{name} ({share}%)" for name, share in traffic['sources'].items())
                 st.markdown(f"""
-                **🏢 Основная информация:**
-                - Сайт: {competitor_data['url']}
-                - Ниша: {competitor_data['niche']}
-                - Цена курсов: {competitor_data['price']}
-                - Количество студентов: {competitor_data['students']}
-                - Рейтинг: ⭐ {competitor_data['rating']}/5
-                
                 **📈 Анализ трафика:**
-                - Посещений в месяц: ~250,000
-                - Источники трафика: Поиск (45%), Реклама (35%), Прямые (20%)
+                - Посещений в месяц: ~{traffic['visits']:,}
+                - Источники трафика: {traffic_sources}
                 - Ключевые слова: курсы {competitor_data['niche'].lower()}, обучение онлайн
                 """)
-            
-            with col2:
+            else:
+                st.info("📈 Данные о трафике пока не собраны")
+        
+        with col2:
+            if traffic and pricing:
                 st.markdown(f"""
                 **🎯 Маркетинговая стратегия:**
-                - Основной канал: Facebook + Instagram
-                - Рекламный бюджет: ~500,000₽/месяц
-                - Главный оффер: "Освой профессию за 4 месяца"
-                - USP: Гарантия трудоустройства
-                
-                **💰 Ценообразование:**
-                - Базовый тариф: {competitor_data['price']}
-                - Рассрочка: 12 месяцев
-                - Скидки: до 50% на Black Friday
-                - Средний чек: 65,000₽
+                - Основной канал: {traffic['main_channel']}
+                - Рекламный бюджет: ~{traffic['ad_budget']:,}₽/месяц
+                - Главный оффер: "{pricing['offer']}"
+                - USP: {pricing['usp']}
                 """)
             
-            # График активности
-            st.subheader("📈 Активность конкурента")
+            if pricing:
+                st.markdown(f"""
+                **💰 Ценообразование:**
+                - Базовый тариф: {format_rub(competitor_data['price'])}
+                - Рассрочка: {pricing['installment_months']} месяцев
+                - Скидки: {pricing['max_discount']}
+                - Средний чек: {pricing['average_check']:,}₽
+                """)
+            else:
+                st.info("💰 Данные о ценах пока не собраны")
+        
+        # График активности
+        st.subheader("📈 Активность конкурента")
+        
+        activity = results.get('activity')
+        if activity:
+            period = st.select_slider("Период", options=list(ACTIVITY_PERIODS), value="30 дней")
+            days = ACTIVITY_PERIODS[period]
+            start = None if days is None else activity['end'] - days * 24 * 3600 + 1
             
-            dates = pd.date_range(start=datetime.now()-timedelta(days=30), end=datetime.now(), freq='D')
-            activity_data = pd.DataFrame({
-                'Дата': dates,
-                'Рекламная активность': [20 + i*0.5 + (i%7)*3 for i in range(len(dates))],
-                'Новые посты': [(i%5)+1 for i in range(len(dates))]
-            })
+            # Из хранилища читаем только выбранный период и прореживаем до ~800 точек:
+            # чем уже период, тем подробнее график
+            activity_data = activity_frame(get_series_store(), competitor_data['id'], start=start)
             
-            fig = px.line(activity_data, x='Дата', y=['Рекламная активность', 'Новые посты'], 
-                         title=f"Активность {competitor_data['name']} за последний месяц")
-            st.plotly_chart(fig, use_container_width=True)
+            fig = get_figure_cache().figure('line', activity_data, x='Дата', y='Значение', color='Метрика',
+                                            title=f"Активность {competitor_data['name']}: {period.lower()}")
+            st.plotly_chart(fig, width="stretch")
+        else:
+            st.info("📈 Данные об активности пока не собраны")
+    
+    @st.fragment
+    def render_reviews_tab(competitor_data, results):
+        st.markdown(f"### ⭐ Отзывы и репутация: **{competitor_data['name']}**")
         
-        with tab2:
-            st.markdown(f"### ⭐ Отзывы и репутация: **{competitor_data['name']}**")
-            
-            col1, col2 = st.columns([2, 1])
+        col1, col2 = st.columns([2, 1])
+        
+        reviews_data = results.get('reviews')
+        
+        with col1:
+            st.subheader("📊 Анализ отзывов")
             
-            with col1:
-                st.subheader("📊 Анализ отзывов")
+            if not reviews_data:
+                st.info("⭐ Отзывы пока не собраны")
+                reviews_data = {"sources": [], "samples": [], "sentiment": {}}
+            else:
+                st.caption(f"Обработано отзывов: {reviews_data['total']:,}")
                 
                 # Источники отзывов
-                review_sources = pd.DataFrame({
-                    'Источник': ['Otzovik', 'VK группа', 'Яндекс.Карты', 'Google', 'IRecommend'],
-                    'Количество отзывов': [45, 128, 67, 89, 23],
-                    'Средний рейтинг': [4.2, 4.4, 4.1, 4.3, 4.0]
-                })
-                
-                fig = px.bar(review_sources, x='Источник', y='Количество отзывов', 
-                           color='Средний рейтинг', 
-                           title="Отзывы по источникам")
-                st.plotly_chart(fig, use_container_width=True)
-                
-                st.subheader("💬 Примеры отзывов")
-                
-                reviews = [
-                    {
-                        "author": "Анна К.", 
-                        "rating": "⭐⭐⭐⭐⭐",
-                        "text": "Отличный курс! За 3 месяца освоила таргетинг с нуля. Преподаватели объясняют понятно, много практики.",
-                        "source": "Otzovik",
-                        "sentiment": "positive"
-                    },
-                    {
-                        "author": "Дмитрий М.", 
-                        "rating": "⭐⭐⭐",
-                        "text": "Курс неплохой, но дороговато. Можно было бы больше актуальных кейсов добавить.",
-                        "source": "VK",
-                        "sentiment": "neutral"
-                    },
-                    {
-                        "author": "Елена С.", 
-                        "rating": "⭐⭐",
-                        "text": "Разочарована. Обещали помочь с трудоустройством, но поддержки почти нет.",
-                        "source": "Google",
-                        "sentiment": "negative"
-                    }
-                ]
+                review_sources = pd.DataFrame(reviews_data['sources'])
                 
-                for review in reviews:
-                    sentiment_color = {"positive": "#dcfce7", "neutral": "#fef3c7", "negative": "#fecaca"}
-                    color = sentiment_color.get(review["sentiment"], "#f9fafb")
-                    
-                    st.markdown(f"""
-                    <div style="background: {color}; border: 1px solid #e5e7eb; padding: 1rem; border-radius: 8px; margin: 0.8rem 0;">
-                        <strong>{review['author']}</strong> • {review['rating']} • {review['source']}<br>
-                        "{review['text']}"
-                    </div>
-                    """, unsafe_allow_html=True)
+                fig = get_figure_cache().figure('bar', review_sources, x='Источник', y='Количество отзывов', 
+                                                color='Средний рейтинг', 
+                                                title="Отзывы по источникам")
+                st.plotly_chart(fig, width="stretch")
             
-            with col2:
-                st.subheader("🔍 Инсайты из отзывов")
-                
-                st.markdown("""
-                **😊 ТОП ПОХВАЛ:**
-                • Качественная подача материала (67%)
-                • Много практических заданий (54%) 
-                • Отзывчивые кураторы (48%)
-                • Актуальная информация (41%)
-                
-                **😞 ТОП ЖАЛОБ:**
-                • Высокая цена (34%)
-                • Слабая поддержка трудоустройства (28%)
-                • Мало обратной связи (22%)
-                • Устаревшие кейсы (18%)
-                
-                **💡 ВОЗМОЖНОСТИ ДЛЯ ВАС:**
-                ✅ Сделать цену на 20% ниже
-                ✅ Акцент на помощь с трудоустройством
-                ✅ Персональная обратная связь
-                ✅ Свежие кейсы 2024 года
-                """)
-                
-                st.markdown("---")
-                
-                st.subheader("📈 Sentiment анализ")
-                
-                sentiment_data = pd.DataFrame({
-                    'Тип': ['Позитивные', 'Нейтральные', 'Негативные'],
-                    'Процент': [65, 25, 10]
-                })
-                
-                fig_pie = px.pie(sentiment_data, values='Процент', names='Тип',
-                               color_discrete_map={'Позитивные': '#10b981', 'Нейтральные': '#f59e0b', 'Негативные': '#ef4444'})
-                st.plotly_chart(fig_pie, use_container_width=True)
-        
-        with tab3:
-            st.markdown(f"### 📱 Соцсети: **{competitor_data['name']}**")
-            
-            col1, col2 = st.columns(2)
+            st.subheader("💬 Примеры отзывов")
             
-            with col1:
-                st.subheader("👥 VK группа")
-                st.markdown("""
-                **📊 Статистика:**
-                - Подписчики: 45,600
-                - Охват постов: 3,000-8,000
-                - Частота: 3-4 поста в день
-                - Лучшее время: 10:00, 14:00, 18:00
-                """)
-                
-                st.subheader("🔥 Популярные посты")
-                
-                vk_posts = [
-                    {"content": "Кейс студента: увеличил продажи на 300% за месяц", "likes": 450, "comments": 67},
-                    {"content": "Бесплатный вебинар: 5 ошибок в таргетинге", "likes": 320, "comments": 89}, 
-                    {"content": "Скидка 40% только до конца недели!", "likes": 280, "comments": 34}
-                ]
+            for review in reviews_data['samples']:
+                sentiment_color = {"positive": "#dcfce7", "neutral": "#fef3c7", "negative": "#fecaca"}
+                color = sentiment_color.get(review["sentiment"], "#f9fafb")
                 
-                for post in vk_posts:
-                    st.markdown(f"""
-                    <div class="social-post">
-                        <strong>VK:</strong> "{post['content']}"<br>
-                        <small>❤️ {post['likes']} • 💬 {post['comments']}</small>
-                    </div>
-                    """, unsafe_allow_html=True)
+                st.markdown(f"""
+                <div style="background: {color}; border: 1px solid #e5e7eb; padding: 1rem; border-radius: 8px; margin: 0.8rem 0;">
+                    <strong>{review['author']}</strong> • {review['rating']} • {review['source']}<br>
+                    "{review['text']}"
+                </div>
+                """, unsafe_allow_html=True)
+        
+        with col2:
+            st.subheader("🔍 Инсайты из отзывов")
             
-            with col2:
-                st.subheader("📸 Instagram")
-                st.markdown("""
-                **📊 Статистика:**
-                - Подписчики: 28,900
-                - Охват Stories: 5,000-12,000
-                - Частота: 1-2 поста + Stories ежедневно
-                - ER: 4.2% (хороший показатель)
-                """)
-                
-                st.subheader("📈 Популярный контент")
-                
-                instagram_posts = [
-                    {"content": "До/После: портфолио студента-дизайнера", "likes": 890, "type": "Карусель"},
-                    {"content": "Stories: быстрые советы по SMM", "views": 6500, "type": "Stories"},
-                    {"content": "Reels: день из жизни SMM-щика", "likes": 1200, "type": "Video"}
-                ]
-                
-                for post in instagram_posts:
-                    metric = f"👁️ {post['views']}" if 'views' in post else f"❤️ {post['likes']}"
-                    st.markdown(f"""
-                    <div class="social-post">
-                        <strong>IG:</strong> "{post['content']}"<br>
-                        <small>{post['type']} • {metric}</small>
-                    </div>
-                    """, unsafe_allow_html=True)
+            topics = reviews_data.get('topics')
+            if topics:
+                insight_lines = (
+                    ["**😊 ТОП ПОХВАЛ:**"]
+                    + [f"• {topic} ({share}%)" for topic, share in topics['praise'][:4]]
+                    + ["", "**😞 ТОП ЖАЛОБ:**"]
+                    + [f"• {topic} ({share}%)" for topic, share in topics['complaints'][:4]]
+                    + ["", "**💡 ВОЗМОЖНОСТИ ДЛЯ ВАС:**"]
+                    + [f"✅ {OPPORTUNITIES[topic]}" for topic, _ in topics['complaints'][:4]]
+                )
+                st.markdown("  \n".join(insight_lines))
+            else:
+                st.info("🔍 Темы отзывов пока не посчитаны")
             
             st.markdown("---")
             
-            st.subheader("💡 Инсайты для вашей стратегии")
+            st.subheader("📈 Sentiment анализ")
             
-            col1, col2 = st.columns(2)
+            if reviews_data['sentiment']:
+                sentiment_data = pd.DataFrame({
+                    'Тип': list(reviews_data['sentiment']),
+                    'Процент': list(reviews_data['sentiment'].values())
+                })
+                
+                fig_pie = get_figure_cache().figure('pie', sentiment_data, values='Процент', names='Тип',
+                                                    color_discrete_map={'Позитивные': '#10b981', 'Нейтральные': '#f59e0b', 'Негативные': '#ef4444'})
+                st.plotly_chart(fig_pie, width="stretch")
+    
+    @st.fragment
+    def render_social_tab(competitor_data, results):
+        st.markdown(f"### 📱 Соцсети: **{competitor_data['name']}**")
+        
+        social = results.get('social') or {}
+        networks = social.get('networks')
+        if not networks:
+            st.info("📱 Данные по соцсетям пока не собраны")
+            return
+        
+        def render_posts(network, label):
+            for post in networks[network]['top_posts']:
+                metric = f"👁️ {post['views']:,}" if post['format'] == 'Stories' else f"❤️ {post['likes']:,} • 💬 {post['comments']:,}"
+                st.markdown(f"""
+                <div class="social-post">
+                    <strong>{label}:</strong> "{post['content']}"<br>
+                    <small>{post['format']} • {metric}</small>
+                </div>
+                """, unsafe_allow_html=True)
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.subheader("👥 VK группа")
+            vk = networks['VK']
+            st.markdown(f"""
+            **📊 Статистика ({vk['posts']:,} постов):**
+            - Подписчики: {vk['followers']:,}
+            - Охват постов: {vk['reach'][0]:,}-{vk['reach'][1]:,}
+            - Частота: {vk['frequency']:.1f} поста в день
+            - Лучшее время: {social['posting_times'].get('VK', '—')}
+            """)
             
-            with col1:
-                st.markdown("""
-                **🎯 Что копировать:**
-                • Кейсы студентов - самый популярный контент
-                • Бесплатные вебинары для привлечения
-                • Stories с быстрыми советами
-                • Формат "до/после" работает отлично
-                """)
+            st.subheader("🔥 Популярные посты")
+            render_posts('VK', 'VK')
+        
+        with col2:
+            st.subheader("📸 Instagram")
+            instagram = networks['Instagram']
+            st.markdown(f"""
+            **📊 Статистика ({instagram['posts']:,} постов):**
+            - Подписчики: {instagram['followers']:,}
+            - Охват: {instagram['reach'][0]:,}-{instagram['reach'][1]:,}
+            - Частота: {instagram['frequency']:.1f} поста в день
+            - ER: {instagram['er']:.1f}%
+            """)
             
-            with col2:
-                st.markdown("""
-                **⏰ Оптимальное время постов:**
-                • VK: 10:00, 14:00, 18:00
-                • Instagram: 12:00, 19:00, 21:00
-                • Stories: 9:00-10:00, 17:00-19:00
-                • Reels: 18:00-21:00
-                """)
+            st.subheader("📈 Популярный контент")
+            render_posts('Instagram', 'IG')
+        
+        st.markdown("---")
+        
+        st.subheader("🗓️ Когда аудитория вовлекается")
+        network = st.radio("Соцсеть", list(networks), horizontal=True, key="social_network")
+        summary = networks[network]
         
-        with tab4:
-            st.markdown("### 🎨 Генератор креативов")
-            st.markdown("*На основе анализа конкурентов создаем ваши уникальные креативы*")
+        col1, col2 = st.columns([2, 1])
+        
+        with col1:
+            # Средний ER по часам недели (московское время)
+            heatmap_data = pd.DataFrame({
+                'День': [day for day in WEEKDAYS for _ in range(24)],
+                'Час': [f"{hour}:00" for _ in WEEKDAYS for hour in range(24)],
+                'ER, %': [rate for row in summary['heatmap'] for rate in row],
+            })
+            fig_heatmap = get_figure_cache().figure('heatmap', heatmap_data, x='Час', y='День', z='ER, %',
+                                                    color_continuous_scale='Blues')
+            st.plotly_chart(fig_heatmap, width="stretch")
+        
+        with col2:
+            formats_data = pd.DataFrame(summary['formats']).rename(columns={'format': 'Формат', 'posts': 'Постов', 'er': 'ER, %'})
+            fig_formats = get_figure_cache().figure('bar', formats_data, x='Формат', y='ER, %', hover_data=['Постов'],
+                                                    title="ER по форматам")
+            st.plotly_chart(fig_formats, width="stretch")
+        
+        st.subheader("💡 Инсайты для вашей стратегии")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            render_bullets("🎯 Что копировать:", social['what_to_copy'])
+        
+        with col2:
+            render_bullets("⏰ Оптимальное время постов:", [f"{channel}: {hours}" for channel, hours in social['posting_times'].items()])
+    
+    @st.fragment
+    def render_creatives_tab(competitor_data, results, selected_schools):
+        st.markdown("### 🎨 Генератор креативов")
+        st.markdown("*На основе анализа конкурентов создаем ваши уникальные креативы*")
+        
+        col1, col2 = st.columns([2, 1])
+        
+        with col1:
+            st.subheader("📝 Параметры вашего курса")
             
-            col1, col2 = st.columns([2, 1])
+            your_course = st.text_input("Название вашего курса", placeholder="Курс по Instagram-маркетингу PRO")
+            your_price = st.text_input("Ваша цена", placeholder="34,900₽")
+            your_usp = st.text_area("Ваше уникальное предложение", 
+                                  placeholder="Что будет отличать вас от конкурентов?")
             
-            with col1:
-                st.subheader("📝 Параметры вашего курса")
-                
-                your_course = st.text_input("Название вашего курса", placeholder="Курс по Instagram-маркетингу PRO")
-                your_price = st.text_input("Ваша цена", placeholder="34,900₽")
-                your_usp = st.text_area("Ваше уникальное предложение", 
-                                      placeholder="Что будет отличать вас от конкурентов?")
-                
-                creative_type = st.selectbox(
-                    "Тип креатива",
-                    ["Пост для VK", "Instagram пост", "Stories", "Рекламное объявление", "Email письмо"]
+            creative_type = st.selectbox("Тип креатива", CREATIVE_TYPES)
+            
+            def make_prompt(school, creative_type):
+                return CreativePrompt(
+                    creative_type, your_course.strip(), your_price.strip(), your_usp.strip(),
+                    school['name'], format_rub(school['price'])
                 )
+            
+            col_one, col_all = st.columns(2)
+            with col_one:
+                create_one = st.button("✨ Создать креативы", type="primary")
+            with col_all:
+                create_all = st.button(f"⚡ Все форматы × все школы ({len(CREATIVE_TYPES) * len(selected_schools)})")
+            
+            creative_cache = get_creative_cache()
+            version = analysis_version(results)
+            
+            if create_one:
+                prompt = make_prompt(competitor_data, creative_type)
+                creatives = creative_cache.get(prompt, version)
                 
-                if st.button("✨ Создать креативы", type="primary"):
-                    with st.spinner("Анализируем конкурентов и создаем ваши креативы..."):
-                        time.sleep(2)
-                        
-                        st.success("🎉 Креативы готовы!")
-                        
-                        # Генерируем креативы на основе анализа конкурентов
-                        generated_creatives = [
-                            {
-                                "title": "🔥 Креатив #1: Бьем конкурентов по цене",
-                                "headline": f"{your_course} - результат как у {competitor_data['name']}, но на 30% дешевле!",
-                                "description": f"Пока {competitor_data['name']} берет {competitor_data['price']}, ты получаешь тот же результат за {your_price}. Почему переплачивать?",
-                                "insight": f"💡 Основано на жалобах клиентов {competitor_data['name']} на высокую цену"
-                            },
-                            {
-                                "title": "⭐ Креатив #2: Решаем их слабое место",  
-                                "headline": f"Гарантируем трудоустройство или возвращаем 100% денег",
-                                "description": f"В отличие от других школ, мы не бросаем студентов после курса. Персональная помощь с поиском работы в течение 6 месяцев.",
-                                "insight": f"💡 Основано на жалобах клиентов {competitor_data['name']} на слабую поддержку трудоустройства"
-                            },
-                            {
-                                "title": "🎯 Креатив #3: Копируем их сильные стороны",
-                                "headline": f"Кейс студента: +300% к продажам за месяц (как у {competitor_data['name']})",
-                                "description": f"Тот же результат, что показывают в {competitor_data['name']}, но с персональным ментором и современными кейсами 2024 года.",
-                                "insight": "💡 Основано на самом популярном формате контента конкурентов"
-                            }
-                        ]
-                        
-                        for creative in generated_creatives:
-                            st.markdown(f"""
-                            <div style="background: #f0f9ff; border: 2px solid #0ea5e9; padding: 1.5rem; border-radius: 12px; margin: 1rem 0;">
-                                <h4>{creative['title']}</h4>
-                                <p><strong>Заголовок:</strong> {creative['headline']}</p>
-                                <p><strong>Описание:</strong> {creative['description']}</p>
-                                <p><em>{creative['insight']}</em></p>
-                            </div>
-                            """, unsafe_allow_html=True)
+                if creatives is None:
+                    # Промах кеша: показываем текст по мере генерации, не дожидаясь конца
+                    placeholder = st.empty()
+                    placeholder.markdown("⏳ Анализируем конкурентов и создаем ваши креативы...")
+                    text, last_render = "", 0.0
+                    metrics.count("llm_calls")
+                    try:
+                        with metrics.span("creatives", mode="stream"):
+                            for token in get_creative_backend().stream(prompt):
+                                text += token
+                                if time.monotonic() - last_render > 0.05:
+                                    last_render = time.monotonic()
+                                    with placeholder.container():
+                                        render_creative_cards(parse_creatives(text))
+                        creatives = parse_creatives(text)
+                        creative_cache.put(prompt, creatives, version)
+                    except Exception as exc:
+                        placeholder.error(f"Не удалось создать креативы: {exc}")
+                    else:
+                        with placeholder.container():
+                            st.success("🎉 Креативы готовы!")
+                            render_creative_cards(creatives)
+                else:
+                    st.success("🎉 Креативы готовы! (из кеша)")
+                    render_creative_cards(creatives)
             
-            with col2:
-                st.subheader("🧠 AI рекомендации")
+            if create_all:
+                progress_bar = st.progress(0, text="Создаем креативы...")
                 
-                st.markdown(f"""
-                **На основе анализа {competitor_data['name']}:**
+                # Сначала размечаем места под все креативы, потом заполняем их по мере готовности
+                slots = {}
+                for school in selected_schools:
+                    with st.expander(f"🏫 {school['name']}", expanded=True):
+                        for batch_type in CREATIVE_TYPES:
+                            slot = st.empty()
+                            slot.markdown(f"⏳ **{batch_type}** — генерируем...")
+                            slots.setdefault(make_prompt(school, batch_type), []).append(slot)
                 
-                **✅ Используйте в креативах:**
-                • Кейсы с конкретными цифрами
-                • Формат "до/после"  
-                • Акцент на гарантии результата
-                • Сравнение с конкурентами
+                def fill(prompt, creatives=None, error=None):
+                    for slot in slots[prompt]:
+                        with slot.container():
+                            st.markdown(f"**{prompt.creative_type}**")
+                            if error:
+                                st.error(f"Не удалось создать креативы: {error}")
+                            else:
+                                render_creative_cards(creatives)
                 
-                **🎯 Оптимальная стратегия:**
-                • Цена на 20-30% ниже {competitor_data['name']}
-                • Акцент на персональную поддержку
-                • Современные кейсы 2024 года
-                • Гарантия трудоустройства
+                # Готовые креативы берем из кеша, к бэкенду идут только промахи
+                missing = []
+                for prompt in slots:
+                    creatives = creative_cache.get(prompt, version)
+                    if creatives is None:
+                        missing.append(prompt)
+                    else:
+                        fill(prompt, creatives)
                 
-                **📱 Площадки для запуска:**
-                • VK: кейсы студентов
-                • Instagram: до/после результаты
-                • Facebook: длинные посты с историями
-                """)
+                done = len(slots) - len(missing)
+                progress_bar.progress(done / len(slots), text=f"Готово {done} из {len(slots)}")
+                with metrics.span("creatives", mode="batch"):
+                    for result in generate_batch(missing, get_creative_backend()):
+                        if not result.error:
+                            creative_cache.put(result.prompt, result.creatives, version)
+                        fill(result.prompt, result.creatives, result.error)
+                        done += 1
+                        progress_bar.progress(done / len(slots), text=f"Готово {done} из {len(slots)}")
+        
+        with col2:
+            st.subheader("🧠 AI рекомендации")
+            
+            st.markdown(f"**На основе анализа {competitor_data['name']}:**")
+            for title, items in creative_recommendations(competitor_data['name']).items():
+                render_bullets(title, items)
+    
+    if competitor_data:
+        
+        analysis = st.session_state.analysis_results.get(competitor_data['id'])
+        
+        if st.button("🔄 Обновить анализ", help="Сбросить кеш и заново собрать данные по этой школе"):
+            cache = get_analysis_cache()
+            cache.invalidate(competitor_data['id'])
+            with st.spinner(f"Обновляем данные по {competitor_data['name']}..."), metrics.span("analysis"):
+                st.session_state.analysis_results.update(
+                    analyze_schools([competitor_data], default_collectors(get_topic_store(), get_series_store(), get_post_store()),
+                                    cache=cache, shared=get_shared_results())
+                )
+            st.rerun()
+        
+        results = analysis.results if analysis else {}
+        if analysis and analysis.stored_at:
+            st.caption(f"🕒 Данные собраны {format_age(time.time() - min(analysis.stored_at.values()))}")
+        if analysis and analysis.errors:
+            st.warning(f"⚠️ Часть данных не собрана: {', '.join(sorted(analysis.errors))}. Показываем то, что успели получить.")
+        
+        # Вкладки анализа
+        tab1, tab2, tab3, tab4 = st.tabs(
+            ["📊 Общая информация", "⭐ Отзывы и репутация", "📱 Соцсети", "🎨 Генератор креативов"],
+            key="analysis_tab", on_change="rerun"
+        )
+        
+        # Содержимое и графики строим только для открытой вкладки
+        if tab1.open:
+            with tab1, metrics.span("tab", tab="overview"):
+                render_overview_tab(competitor_data, results)
+        elif tab2.open:
+            with tab2, metrics.span("tab", tab="reviews"):
+                render_reviews_tab(competitor_data, results)
+        elif tab3.open:
+            with tab3, metrics.span("tab", tab="social"):
+                render_social_tab(competitor_data, results)
+        elif tab4.open:
+            with tab4, metrics.span("tab", tab="creatives"):
+                render_creatives_tab(competitor_data, results, selected_schools)
     
     # Кнопка для нового поиска
     st.markdown("---")
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
-        if st.button("🔄 Найти новых конкурентов", use_container_width=True):
+        if st.button("🔄 Найти новых конкурентов", width="stretch"):
             # Сбрасываем состояние
             st.session_state.search_completed = False
             st.session_state.analysis_completed = False
-            st.session_state.selected_schools = []
+            st.session_state.selected_ids = set()
+            st.session_state.schools_frame = None
+            st.session_state.pop('schools_view_key', None)
+            st.session_state.analysis_results = {}
             st.rerun()
 
 # Футер
@@ -594,3 +950,8 @@ with col2:
     st.markdown(f"🕒 **Обновлено:** {datetime.now().strftime('%d.%m.%Y %H:%M')}")
 with col3:
     st.markdown("📧 **Поддержка:** support@spy-tool.ru")
+
+# Перезапуск дошёл до конца: отрезки уходят в лог, оператору — панель
+rerun_trace = st.session_state.pop('rerun_trace').finish()
+if ops_enabled:
+    render_ops_panel(rerun_trace, interrupted_trace)
@@ -0,0 +1,32 @@
+"""Версия анализа в ключе кеша креативов: что её меняет, а что нет."""
+
+from spy_tool.analysis import analysis_version
+
+RESULTS = {
+    "activity": {"end": 1_700_000_000, "hours": [1, 2, 3]},
+    "social": {"networks": {"VK": {"posts": 120, "frequency": 2.5}}},
+    "reviews": {"total": 1000, "topics": {"praise": [["Практика", 40]], "complaints": [["Цена", 25]], "reviews": 1000}},
+    "pricing": {"offer": "Освой профессию за 4 месяца", "usp": "Гарантия трудоустройства", "average_check": 65000},
+}
+
+
+def test_version_ignores_hourly_refreshes():
+    refreshed = {
+        **RESULTS,
+        "activity": {"end": 1_700_003_600, "hours": [1, 2, 3, 4]},
+        "social": {"networks": {"VK": {"posts": 121, "frequency": 2.6}}},
+        "reviews": {**RESULTS["reviews"], "total": 1004,
+                    "topics": {**RESULTS["reviews"]["topics"], "reviews": 1004}},
+    }
+
+    assert analysis_version(refreshed) == analysis_version(RESULTS)
+
+
+def test_version_follows_creative_inputs():
+    complaints = {**RESULTS, "reviews": {**RESULTS["reviews"],
+                                         "topics": {**RESULTS["reviews"]["topics"], "complaints": [["Цена", 30]]}}}
+    offer = {**RESULTS, "pricing": {**RESULTS["pricing"], "offer": "Профессия за 6 месяцев"}}
+
+    assert analysis_version(complaints) != analysis_version(RESULTS)
+    assert analysis_version(offer) != analysis_version(RESULTS)
+    assert analysis_version({}) == analysis_version({"activity": {"end": 1}})
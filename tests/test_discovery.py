@@ -0,0 +1,78 @@
+"""``spy_tool.discovery.discover`` на локальных источниках-заглушках."""
+
+import pytest
+
+from spy_tool.discovery import NICHES, SearchQuery, StubSource, discover, matches_query
+
+NICHE = NICHES[0]
+
+
+def school(url, name="Школа", **fields):
+    return {"url": url, "name": name, "niche": "SMM", "category": NICHE, "price": "49,900₽", **fields}
+
+
+class FailingSource:
+    name = "Сломанный"
+
+    def search(self, query):
+        raise RuntimeError("источник недоступен")
+
+
+def test_updates_arrive_in_completion_order():
+    sources = [
+        StubSource("Медленный", [school("https://slow.ru")], delay=0.3),
+        StubSource("Быстрый", [school("https://fast.ru")]),
+        StubSource("Средний", [school("https://middle.ru")], delay=0.15),
+    ]
+
+    updates = list(discover(SearchQuery(NICHE), sources))
+
+    assert [update.source for update in updates] == ["Быстрый", "Средний", "Медленный"]
+    assert [(update.done, update.total) for update in updates] == [(1, 3), (2, 3), (3, 3)]
+
+
+def test_schools_are_deduplicated_by_url_across_sources():
+    sources = [
+        StubSource("Первый", [school("https://a.ru"), school("https://b.ru")]),
+        StubSource("Второй", [school("https://b.ru", "Школа Б"), school("https://c.ru")], delay=0.1),
+    ]
+
+    updates = list(discover(SearchQuery(NICHE), sources))
+
+    assert [[item["url"] for item in update.schools] for update in updates] == [
+        ["https://a.ru", "https://b.ru"],
+        ["https://c.ru"],
+    ]
+
+
+def test_failing_source_does_not_stop_the_others():
+    sources = [FailingSource(), StubSource("Рабочий", [school("https://ok.ru")], delay=0.1)]
+
+    updates = {update.source: update for update in discover(SearchQuery(NICHE), sources)}
+
+    assert updates["Сломанный"].error == "источник недоступен" and updates["Сломанный"].schools == []
+    assert updates["Рабочий"].error is None
+    assert [item["url"] for item in updates["Рабочий"].schools] == ["https://ok.ru"]
+    assert updates["Рабочий"].total == 2
+
+
+@pytest.mark.parametrize("fields, expected", [
+    ({}, True),
+    ({"category": NICHES[1]}, False),
+    ({"price": "150 000 ₽"}, False),
+    ({"students": 500}, False),
+    ({"region": "Весь мир"}, False),
+    ({"name": "Академия таргетинга"}, True),
+    ({"name": "Школа дизайна"}, False),
+])
+def test_matches_query_filters(fields, expected):
+    query = SearchQuery(NICHE, keywords="таргетинг", school_size="Средняя (1000-10000)")
+    candidate = school("https://x.ru", name="Таргетинг с нуля", students=5000, region="Россия")
+
+    assert matches_query({**candidate, **fields}, query) is expected
+
+
+def test_stub_source_applies_matches_query():
+    source = StubSource("Каталог", [school("https://in.ru"), school("https://out.ru", category=NICHES[1])])
+
+    assert [item["url"] for item in source.search(SearchQuery(NICHE))] == ["https://in.ru"]
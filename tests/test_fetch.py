@@ -0,0 +1,135 @@
+"""``spy_tool.fetch`` против локального HTTP-сервера-заглушки в отдельном потоке."""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from spy_tool.fetch import Fetcher, HttpCache
+
+
+class StubServer(ThreadingHTTPServer):
+    """Сервер с заранее заданными ответами по пути; запоминает каждый пришедший запрос.
+
+    ``responses[path]`` — список ``(статус, заголовки, тело)``: ответы отдаются по
+    очереди, последний повторяется. ``seen`` — ``(время, путь, заголовки, порт клиента)``.
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubHandler)
+        self.responses = {}
+        self.seen = []
+        self.lock = threading.Lock()
+
+    @property
+    def base(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def respond(self, path):
+        with self.lock:
+            queue = self.responses[path]
+            return queue.pop(0) if len(queue) > 1 else queue[0]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # HTTP/1.1 держит соединение открытым между запросами
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.seen.append((time.monotonic(), self.path, dict(self.headers), self.client_address[1]))
+        status, headers, body = self.server.respond(self.path)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = StubServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def fetcher(tmp_path):
+    fetcher = Fetcher(cache=HttpCache(tmp_path / "http.sqlite"), rate=0, backoff=0.01)
+    yield fetcher
+    fetcher.session.close()
+
+
+def test_not_modified_replays_cached_body(server, fetcher):
+    server.responses["/page"] = [
+        (200, {"ETag": '"v1"', "Content-Type": "text/plain"}, b"cached body"),
+        (304, {"ETag": '"v1"'}, b""),
+    ]
+
+    first = fetcher.get(server.base + "/page")
+    second = fetcher.get(server.base + "/page")
+
+    assert not first.from_cache and first.content == b"cached body"
+    assert second.from_cache and second.status == 200 and second.content == b"cached body"
+    assert second.headers["Content-Type"] == "text/plain"
+    assert server.seen[1][2]["If-None-Match"] == '"v1"'
+    assert fetcher.stats["not_modified"] == 1
+
+
+def test_retry_after_is_honoured(server, fetcher):
+    server.responses["/busy"] = [(503, {"Retry-After": "0.3"}, b""), (200, {}, b"ok")]
+    fetcher.backoff = 30
+
+    started = time.monotonic()
+    result = fetcher.get(server.base + "/busy")
+
+    assert result.status == 200 and result.content == b"ok"
+    assert fetcher.stats["retries"] == 1
+    # Пауза взята из Retry-After, а не из экспоненциальной задержки с backoff=30
+    assert 0.3 <= server.seen[1][0] - server.seen[0][0] < 5
+    assert time.monotonic() - started < 5
+
+
+def test_connections_are_reused(server, fetcher):
+    for number in range(5):
+        server.responses[f"/item/{number}"] = [(200, {}, b"x" * 100)]
+        fetcher.get(f"{server.base}/item/{number}")
+
+    assert len({port for _, _, _, port in server.seen}) == 1
+
+
+def test_requests_to_one_host_are_spaced_by_rate(server, fetcher):
+    server.responses["/rated"] = [(200, {}, b"ok")]
+    fetcher.rate = 10
+    threads = [threading.Thread(target=fetcher.get, args=(server.base + "/rated",)) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    arrivals = sorted(at for at, _, _, _ in server.seen)
+    assert len(arrivals) == 6
+    # 10 запросов в секунду — не чаще одного в 0.1 с (с запасом на планировщик)
+    assert min(later - earlier for earlier, later in zip(arrivals, arrivals[1:])) >= 0.08
+
+
+def test_cache_evicts_oldest_over_budget(tmp_path):
+    cache = HttpCache(tmp_path / "http.sqlite", max_bytes=250)
+    cache.put("http://a", {}, b"a" * 100, now=1)
+    cache.put("http://b", {}, b"b" * 100, now=2)
+    cache.touch("http://a", now=3)
+    cache.put("http://c", {}, b"c" * 100, now=4)
+
+    assert cache.get("http://b") is None
+    assert cache.get("http://a")[1] == b"a" * 100
+    assert cache.get("http://c")[1] == b"c" * 100